@@ -1,27 +1,54 @@
 import discord
 from discord.ui import Button, View
 import asyncio
+from itertools import islice
 from typing import Optional, List
+from bot_utils.edit_scheduler import MessageEditScheduler
 
 
 class JoinQuizView(View):
-    def __init__(self, cog, game_key,gamestarter, timeout=10, allowed_users: Optional[List[discord.Member]] = None):
+    def __init__(self, cog, game_key,gamestarter, timeout=10, allowed_users: Optional[List[discord.Member]] = None,
+                 roster_interval=1.5, roster_sample=10):
         super().__init__()
-        self.players = set()
+        self.players = {}
         self.timeout = timeout
 
         self.game_starter = gamestarter
-        self.allowed_users = allowed_users
+        self.allowed_ids = None
+        if allowed_users is not None:
+            self.allowed_ids = {user.id for user in allowed_users}
+            self.allowed_ids.add(gamestarter.id)
 
         self.cog = cog
         self.game_key = game_key
         self.message = None
+        self.embed = None
+        self.editor = None
+        self.launch_timer = None
+
+        self.roster_timer = None
+        self.roster_interval = roster_interval
+        self.roster_sample = roster_sample
+        self.rendered_count = 0
+
+    def attach(self, message, embed):
+        self.message = message
+        self.embed = embed
+        self.editor = MessageEditScheduler(message, self.cog.edit_buckets)
+
+    def close(self):
+        for timer in (self.launch_timer, self.roster_timer):
+            if timer is not None:
+                timer.cancel()
+        self.launch_timer = None
+        self.roster_timer = None
+        self.stop()
 
     @discord.ui.button(label="Dołącz do quizu", style=discord.ButtonStyle.primary)
     async def join_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         user = interaction.user
 
-        if self.allowed_users is not None and (user not in self.allowed_users and user.id is not self.game_starter.id):
+        if self.allowed_ids is not None and user.id not in self.allowed_ids:
             embed = discord.Embed(
                 title="Nie możesz dołączyć do tego quizu.",
                 description="Nie znajdujesz się na liście dozwolonych uczestników.",
@@ -30,7 +57,7 @@ class JoinQuizView(View):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
-        if user in self.players:
+        if user.id in self.players:
             embed = discord.Embed(
                 title="Już dołączyłeś do quizu",
                 color=discord.Color.red()
@@ -38,23 +65,34 @@ class JoinQuizView(View):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
-        self.players.add(user)
+        self.players[user.id] = user.name
         embed = discord.Embed(
             title="Dołączyłeś do quizu",
             color=discord.Color.green()
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-        if len(self.players) <= 7:
-            message = interaction.message
-            embed = message.embeds[0]
-            player_names = ', '.join([player.name for player in self.players])
-            if len(self.players) == 7:
-                player_names += "..."
-            fields = [field for field in embed.fields if field.name != "Uczestnicy:"]
-            embed.clear_fields()
-            for field in fields:
-                embed.add_field(name=field.name, value=field.value, inline=field.inline)
-            embed.add_field(name="Uczestnicy:", value=player_names or "Brak", inline=False)
-            await message.edit(embed=embed)
+        # zamiast edycji na każde kliknięcie lista odświeża się raz na roster_interval
+        if self.roster_timer is None and not self.is_finished():
+            self.roster_timer = self.cog.scheduler.call_later(self.roster_interval, self.cog.spawn,
+                                                              self.render_roster)
+
+    def roster_text(self):
+        names = list(islice(self.players.values(), self.roster_sample))
+        text = ', '.join(names) or "Brak"
+        if len(self.players) > len(names):
+            text += f"... oraz {len(self.players) - len(names)} innych"
+        return text
+
+    async def render_roster(self):
+        self.roster_timer = None
+        count = len(self.players)
+        if self.is_finished() or self.editor is None or count == self.rendered_count:
+            return
 
+        self.rendered_count = count
+        self.embed.set_field_at(0, name=f"Uczestnicy ({count}):", value=self.roster_text(), inline=False)
+        try:
+            await self.editor.edit(embed=self.embed)
+        except discord.HTTPException as e:
+            print(f"Błąd podczas edycji wiadomości: {e}")
@@ -0,0 +1,121 @@
+from array import array
+
+ACTIVE = 1
+KICKED = 2
+SCORED = 4
+DIRTY = 8
+
+
+class PlayerRegistry:
+    __slots__ = ("slots", "ids", "scores", "streaks", "flags", "answered_round",
+                 "round", "active_count", "answered_count")
+
+    def __init__(self, user_ids=()):
+        self.slots = {}
+        self.ids = array("q")
+        self.scores = array("q")
+        self.streaks = array("l")
+        self.flags = bytearray()
+        self.answered_round = array("l")
+
+        self.round = 1
+        self.active_count = 0
+        self.answered_count = 0
+
+        for user_id in user_ids:
+            self.add(user_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, user_id):
+        slot = self.slots.get(user_id)
+        return slot is not None and self.flags[slot] & ACTIVE
+
+    def add(self, user_id):
+        slot = self.slots.get(user_id)
+        if slot is not None:
+            return slot
+        slot = len(self.ids)
+        self.slots[user_id] = slot
+        self.ids.append(user_id)
+        self.scores.append(0)
+        self.streaks.append(0)
+        self.flags.append(ACTIVE)
+        self.answered_round.append(0)
+        self.active_count += 1
+        return slot
+
+    def is_kicked(self, user_id):
+        slot = self.slots.get(user_id)
+        return slot is not None and self.flags[slot] & KICKED
+
+    def kick(self, user_id):
+        slot = self.slots.get(user_id)
+        if slot is None or not self.flags[slot] & ACTIVE:
+            return False
+        self.flags[slot] = KICKED
+        self.active_count -= 1
+        if self.answered_round[slot] == self.round:
+            self.answered_count -= 1
+        return True
+
+    def new_round(self):
+        self.round += 1
+        self.answered_count = 0
+
+    def mark_answered(self, user_id):
+        slot = self.slots[user_id]
+        if self.answered_round[slot] == self.round:
+            return False
+        self.answered_round[slot] = self.round
+        self.answered_count += 1
+        return True
+
+    def all_answered(self):
+        return self.answered_count >= self.active_count
+
+    def score(self, user_id):
+        return self.scores[self.slots[user_id]]
+
+    def streak(self, user_id):
+        return self.streaks[self.slots[user_id]]
+
+    def add_points(self, user_id, points):
+        slot = self.slots[user_id]
+        self.scores[slot] += points
+        self.streaks[slot] += 1
+        self.flags[slot] |= SCORED | DIRTY
+        return self.scores[slot]
+
+    def reset_streak(self, user_id):
+        slot = self.slots[user_id]
+        self.streaks[slot] = 0
+        self.flags[slot] |= SCORED | DIRTY
+        return self.scores[slot]
+
+    def restore(self, user_id, score=None, streak=None, kicked=False):
+        slot = self.add(user_id)
+        if score is not None:
+            self.scores[slot] = score
+            self.flags[slot] |= SCORED
+        if streak is not None:
+            self.streaks[slot] = streak
+        if kicked:
+            self.kick(user_id)
+
+    def scored(self):
+        for slot, flags in enumerate(self.flags):
+            if flags & SCORED and flags & ACTIVE:
+                yield self.ids[slot], self.scores[slot]
+
+    def take_dirty(self):
+        dirty = []
+        for slot, flags in enumerate(self.flags):
+            if flags & DIRTY:
+                self.flags[slot] = flags & ~DIRTY
+                dirty.append((self.ids[slot], self.scores[slot], self.streaks[slot]))
+        return dirty
+
+    def kicked_ids(self):
+        return [self.ids[slot] for slot, flags in enumerate(self.flags) if flags & KICKED]
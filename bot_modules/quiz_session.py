@@ -1,17 +1,16 @@
 import io
 from logging import ERROR
 
-import bson
 import discord
 import asyncio
 from datetime import datetime, timedelta, timezone
 from model.game_model import GameModel
-from model.resut_model import ResultModel
+from bson import ObjectId
 from model.quiz_model import QuizModel
-from bot_utils.utils import get_row
-from bot_utils.button_padding import calc_string_width, pad_string
+from bot_utils.rank_index import RankIndex
+from bot_utils.edit_scheduler import MessageEditScheduler
+from bot_modules.player_registry import PlayerRegistry
 
-import json
 
 class QuizSession:
     def __init__(self, quiz:QuizModel, channel, cog, players, message, game_starter, correct_answer_display_time=5, scoreboard_display_time=5
@@ -21,17 +20,13 @@ class QuizSession:
 
         self.channel = channel
         self.cog = cog
-        self.players = players
+        self.players = PlayerRegistry(players)
         self.current_question_index = 0
-        self.scores = {}
-        self.answered_users = set()
-        self.kicked_players = set()
 
         self.message = message
         self.current_view = None
         self.game_starter = game_starter
 
-        self.streaks = {player: 0 for player in self.players}
         self.correct_count_for_question = 0
 
         self.correct_answer_display_time = correct_answer_display_time
@@ -41,10 +36,18 @@ class QuizSession:
         self.is_processing_question = False
         self.game_ended = False
 
+        self.layout = self.cog.layout_cache.get(self.quiz)
+        self.quiz_key = None
+        self.ranking = RankIndex()
+        self.editor = None
+        self.question_timer = None
+        self.phase_timer = None
+        self.scoreboard_size = 10
+
 
 
     async def start(self):
-        await self.__save_state()
+        await self.cog.session_store.create(self)
         await self.send_question()
 
     async def send_question(self):
@@ -56,20 +59,14 @@ class QuizSession:
             return
 
         question = self.questions[self.current_question_index]
+        layout = self.layout[self.current_question_index]
 
         self.correct_count_for_question = 0
 
-        max_width = 0.0
-        for opt in question.options:
-            w = calc_string_width(opt.option)
-            if w > max_width:
-                max_width = w
-
-        view = discord.ui.View(timeout=question.time)
-        for idx, option in enumerate(question.options):
-            padded_label = pad_string(option.option, max_width)
-            button = discord.ui.Button(label=padded_label,
-                                       style=discord.ButtonStyle.primary, row=get_row(max_width,idx))
+        view = discord.ui.View(timeout=None)
+        for idx in range(len(question.options)):
+            button = discord.ui.Button(label=layout.labels[idx],
+                                       style=discord.ButtonStyle.primary, row=layout.rows[idx])
             button.callback = self.create_answer_callback(idx)
             view.add_item(button)
 
@@ -81,41 +78,75 @@ class QuizSession:
         )
 
         file = []
+        cdn_url = None
         if question.image_url:
-            try:
-                out = io.BytesIO()
-                await self.cog.fs.download_to_stream(question.image_url, out)
-                out.seek(0)
-                file.append(discord.File(out, filename="question_image.png"))
-                embed.set_image(url="attachment://question_image.png")
-            except Exception as e:
-                print(f"Błąd pobierania obrazu z GridFS: {e}")
+            cdn_url = await self.image_url(question)
+            if cdn_url:
+                embed.set_image(url=cdn_url)
+            else:
+                await self.attach_image(question, embed, file)
+        self.prefetch_images(self.current_question_index + 1)
 
         end_time = datetime.now(timezone.utc) + timedelta(seconds=question.time)
         embed.description=f"**Koniec czasu <t:{int(end_time.timestamp())}:R>** \n\n {question.question}"
 
         if self.message:
             success = await self.safe_message_edit(embed=embed, view=view, file=file)
+            if not success and cdn_url and not self.game_ended:
+                await self.cog.attachment_registry.invalidate(question.image_url)
+                if await self.attach_image(question, embed, file):
+                    success = await self.safe_message_edit(embed=embed, view=view, file=file)
             if not success:
                 return
         else:
-            self.message = await self.channel.send(embed=embed, view=view)
+            self.message = await self.channel.send(embed=embed, view=view, files=file)
 
-        self.answered_users.clear()
+        self.players.new_round()
 
-        self.question_task = asyncio.create_task(self.question_timer(question.time))
+        self.question_timer = self.cog.scheduler.call_later(question.time, self.cog.spawn, self.question_timeout)
 
 
-    async def question_timer(self, time: int):
+    async def image_url(self, question):
+        registry = self.cog.attachment_registry
+        url = await registry.get(question.image_url)
+        if url or registry.channel_id is None:
+            return url
+        try:
+            data = await self.cog.image_cache.get(question.image_url)
+        except Exception as e:
+            print(f"Błąd pobierania obrazu z GridFS: {e}")
+            return None
+        return await registry.upload(question.image_url, data)
+
+    async def attach_image(self, question, embed, file):
         try:
-            await asyncio.sleep(time)
-            for item in self.current_view.children:
-                item.disabled = True
-            await self.question_summary()
-        except asyncio.CancelledError:
-            pass
+            data = await self.cog.image_cache.get(question.image_url)
         except Exception as e:
-            print(f"Błąd w question_timer: {e}")
+            print(f"Błąd pobierania obrazu z GridFS: {e}")
+            return False
+        filename = self.cog.attachment_registry.filename(question.image_url)
+        file.append(discord.File(io.BytesIO(data), filename=filename))
+        embed.set_image(url=f"attachment://{filename}")
+        return True
+
+    def prefetch_images(self, start, count=1):
+        for question in self.questions[start:start + count]:
+            if question.image_url:
+                self.cog.image_cache.prefetch(question.image_url)
+
+    async def question_timeout(self):
+        self.question_timer = None
+        await self.question_summary()
+
+    def schedule_phase(self, when, phase, *args):
+        self.phase_timer = self.cog.scheduler.call_at(when, self.cog.spawn, phase, *args)
+
+    def cancel_timers(self):
+        for timer in (self.question_timer, self.phase_timer):
+            if timer is not None:
+                timer.cancel()
+        self.question_timer = None
+        self.phase_timer = None
 
     async def question_summary(self):
         if self.game_ended:
@@ -124,6 +155,11 @@ class QuizSession:
         if self.is_processing_question:
             return
         self.is_processing_question = True
+        if self.question_timer is not None:
+            self.question_timer.cancel()
+            self.question_timer = None
+        if self.current_view is not None:
+            self.current_view.stop()
         try:
             question = self.questions[self.current_question_index]
             correct_index = next(
@@ -137,20 +173,13 @@ class QuizSession:
             correct_answer = question.options[correct_index].option if correct_index >= 0 else "(brak poprawnej)"
 
             answer_view = discord.ui.View()
+            layout = self.layout[self.current_question_index]
 
-            max_width = 0.0
-            for opt in question.options:
-                w = calc_string_width(opt.option)
-                if w > max_width:
-                    max_width = w
-
-
-            for idx, option in enumerate(question.options):
-                padded_label = pad_string(option.option, max_width)
+            for idx in range(len(question.options)):
                 style = discord.ButtonStyle.green if idx == correct_index else discord.ButtonStyle.danger
 
-                button = discord.ui.Button(label= padded_label, style=style, disabled=True,
-                                           row=get_row(max_width,idx))
+                button = discord.ui.Button(label=layout.labels[idx], style=style, disabled=True,
+                                           row=layout.rows[idx])
                 answer_view.add_item(button)
 
             correct_answer_embed = discord.Embed(
@@ -163,24 +192,34 @@ class QuizSession:
                 end_time = datetime.now(timezone.utc) + timedelta(seconds=self.scoreboard_display_time+self.correct_answer_display_time)
                 correct_answer_embed.add_field(name="Następne pytanie ", value=f"<t:{int(end_time.timestamp())}:R>")
 
+            phase_start = asyncio.get_running_loop().time()
             success = await self.safe_message_edit(embed=correct_answer_embed, view=answer_view)
             if not success:
+                self.is_processing_question = False
                 return
             self.current_question_index += 1
             await self.__save_state()
 
-            await asyncio.sleep(self.correct_answer_display_time)
-            if self.game_ended:
-                return
+            self.schedule_phase(phase_start + self.correct_answer_display_time, self.after_answer, phase_start)
+        except Exception:
+            self.is_processing_question = False
+            raise
 
-            if self.current_question_index >= len(self.quiz.questions):
-                await self.end_game()
-            else:
-                await self.show_scoreboard(next_question_in=self.scoreboard_display_time)
-                await self.show_scoreboard(next_question_in=self.scoreboard_display_time)
-                await asyncio.sleep(self.scoreboard_display_time)
+    async def after_answer(self, phase_start):
+        if self.game_ended:
+            return
+
+        if self.current_question_index >= len(self.quiz.questions):
+            await self.end_game()
+            return
+
+        await self.show_scoreboard(next_question_in=self.scoreboard_display_time)
+        self.schedule_phase(phase_start + self.correct_answer_display_time + self.scoreboard_display_time,
+                            self.next_question)
 
-                await self.send_question()
+    async def next_question(self):
+        try:
+            await self.send_question()
         finally:
             self.is_processing_question = False
 
@@ -191,9 +230,9 @@ class QuizSession:
                     await interaction.response.send_message(embed=embed, ephemeral=True)
                 else:
                     await interaction.response.defer()
-            user = interaction.user
+            user_id = interaction.user.id
 
-            if user.id in self.kicked_players:
+            if self.players.is_kicked(user_id):
                 embed = discord.Embed(
                     title="Zostałeś wyrzucony z tego quizu!",
                     color=discord.Color.red()
@@ -201,7 +240,7 @@ class QuizSession:
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
 
-            if user not in self.players:
+            if user_id not in self.players:
                 embed = discord.Embed(
                     title="Nie jesteś uczestnikiem tego quizu.",
                     color=discord.Color.red()
@@ -209,7 +248,7 @@ class QuizSession:
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
 
-            if user.id in self.answered_users:
+            if not self.players.mark_answered(user_id):
                 embed = discord.Embed(
                     title="Już odpowiedziałeś na to pytanie",
                     color=discord.Color.red()
@@ -217,53 +256,52 @@ class QuizSession:
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
 
-            self.answered_users.add(user.id)
-
             question = self.questions[self.current_question_index]
             answer = question.options[selected_index]
 
-            if user not in self.scores:
-                self.scores[user] = 0
-
             if answer.is_correct:
                 base_points = max(1000 - (self.correct_count_for_question * 100), 500)
                 self.correct_count_for_question += 1
-                streak = self.streaks[user]
+                streak = self.players.streak(user_id)
                 multiplier = 1.0 + (streak * 0.1)
 
-                self.scores[user] += int(base_points*multiplier)
-                self.streaks[user] += 1
+                score = self.players.add_points(user_id, int(base_points*multiplier))
+                self.ranking.update(user_id, score)
 
                 embed = discord.Embed(
                     title="Poprawna odpowiedź!",
                     description=f"Zdobywasz {int(base_points*multiplier)} punktów!",
                     color=discord.Color.green()
                 )
-                embed.add_field(name="Aktualny wynik", value=str(self.scores[user]), inline=True)
-                embed.add_field(name="Streak", value=str(self.streaks[user]), inline=True)
+                embed.add_field(name="Aktualny wynik", value=str(score), inline=True)
+                embed.add_field(name="Streak", value=str(streak + 1), inline=True)
 
                 await callback_mess(embed)
             else:
-                self.streaks[user] = 0
-                streak = 0
+                score = self.players.reset_streak(user_id)
+                self.ranking.update(user_id, score)
 
                 embed = discord.Embed(
                     title="Błędna odpowiedź!",
                     description="Niestety, nie zdobywasz punktów.",
                     color=discord.Color.red()
                 )
-                embed.add_field(name="Aktualny wynik", value=str(self.scores[user]), inline=True)
-                embed.add_field(name="Streak", value=str(streak), inline=True)
+                embed.add_field(name="Aktualny wynik", value=str(score), inline=True)
+                embed.add_field(name="Streak", value="0", inline=True)
                 await callback_mess(embed)
 
-            active_players_count = len([p for p in self.players if p.id not in self.kicked_players])
-            if len(self.answered_users) >= active_players_count:
-                if self.question_task and not self.question_task.done():
-                    self.question_task.cancel()
+            if self.players.all_answered():
                 await self.question_summary()
 
         return callback
 
+    def kick_player(self, user_id):
+        if not self.players.kick(user_id):
+            return False
+        self.ranking.remove(user_id)
+        self.cog.spawn(self.cog.session_store.kick, self, user_id)
+        return True
+
     async def send_mess(self, user, desc):
         pass
         # if self.send_private_messages:
@@ -273,14 +311,13 @@ class QuizSession:
         #         pass
 
     async def show_scoreboard(self, final=False, next_question_in=None):
-        leaderboard = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
         scores_text = ""
-        rank = 1
-        for user, score in leaderboard:
-            member = self.channel.guild.get_member(user.id)
-            user_mention = member.mention if member else f"<@{user.id}>"
-            scores_text += f"**{rank}.** {user_mention} — {score} pkt\n"
-            rank += 1
+        for rank, (user_id, score) in enumerate(self.ranking.top(self.scoreboard_size), start=1):
+            scores_text += f"**{rank}.** <@{user_id}> — {score} pkt\n"
+
+        hidden = len(self.ranking) - self.scoreboard_size
+        if hidden > 0:
+            scores_text += f"\n...oraz {hidden} innych graczy"
 
         title = "Aktualne wyniki" if not final else "Koniec gry! Ostateczne wyniki"
 
@@ -289,18 +326,46 @@ class QuizSession:
             description=scores_text,
             color = discord.Color.blurple() if not final else discord.Color.gold()
         )
+        if len(self.ranking) > 0:
+            scoreboard_embed.add_field(name="Graczy", value=str(len(self.ranking)))
+            scoreboard_embed.add_field(name="Średni wynik", value=f"{int(self.ranking.average())} pkt")
 
         if next_question_in is not None:
             end_time = datetime.now(timezone.utc) + timedelta(seconds=next_question_in)
-            scoreboard_embed.add_field(name="Następne pytanie ", value=f"<t:{int(end_time.timestamp())}:R>")
+            scoreboard_embed.add_field(name="Następne pytanie ", value=f"<t:{int(end_time.timestamp())}:R>", inline=False)
+
+        view = discord.ui.View()
+        button = discord.ui.Button(label="Moja pozycja", style=discord.ButtonStyle.secondary)
+        button.callback = self.my_rank_callback
+        view.add_item(button)
 
-        success = await self.safe_message_edit(embed=scoreboard_embed, view=None)
+        success = await self.safe_message_edit(embed=scoreboard_embed, view=view, essential=final)
         if not success:
             return
 
-    async def safe_message_edit(self, embed=None, view=None, file=[]):
+    async def my_rank_callback(self, interaction: discord.Interaction):
+        user_id = interaction.user.id
+        rank = self.ranking.rank(user_id)
+        if rank is None:
+            embed = discord.Embed(
+                title="Nie masz jeszcze punktów w tym quizie.",
+                color=discord.Color.red()
+            )
+        else:
+            embed = discord.Embed(
+                title=f"Zajmujesz {rank}. miejsce na {len(self.ranking)}",
+                description=f"Twój wynik: {self.ranking.score(user_id)} pkt",
+                color=discord.Color.blurple()
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def safe_message_edit(self, embed=None, view=None, file=[], essential=True):
+        if self.editor is None or self.editor.message.id != self.message.id:
+            self.editor = MessageEditScheduler(self.message, self.cog.edit_buckets)
         try:
-            await self.message.edit(embed=embed, view=view, attachments=file)
+            message = await self.editor.edit(embed=embed, view=view, attachments=file, essential=essential)
+            if message is not None:
+                self.message = message
         except discord.NotFound:
             await self.game_del()
             return False
@@ -313,9 +378,7 @@ class QuizSession:
         if self.game_ended:
             return
         self.game_ended = True
-        if hasattr(self, 'question_task') and not self.question_task.done():
-            self.question_task.cancel()
-        self.question_task = None
+        self.cancel_timers()
 
         view = discord.ui.View()
         embed = discord.Embed(
@@ -337,9 +400,7 @@ class QuizSession:
         self.game_ended = True
         await self.show_scoreboard(final=True)
 
-        if hasattr(self, 'question_task') and not self.question_task.done():
-            self.question_task.cancel()
-        self.question_task = None
+        self.cancel_timers()
 
         game_key = (self.channel.guild.id, self.channel.id)
         if game_key in self.cog.active_games:
@@ -347,68 +408,50 @@ class QuizSession:
 
         await self.__remove_state()
 
-        games_coll = self.cog.db["Games"]
-        results_coll = self.cog.db["Results"]
-
         now = datetime.now(timezone.utc)
         game = GameModel(
+            id=ObjectId(),
             guild_id=self.channel.guild.id,
             quiz_code=self.quiz.access_code,
             finished_at=now
         )
+        doc_game = game.model_dump(by_alias=True, exclude_unset=True)
+        scores = list(self.players.scored())
+        result_docs = [
+            {
+                "_id": ObjectId(),
+                "game_id": game.id,
+                "user_id": user_id,
+                "guild_id": self.channel.guild.id,
+                "score": score,
+                "finished_at": now
+            }
+            for user_id, score in scores
+        ]
+        # najpierw trwały zapis wyników; rankingi w Redisie da się z nich odtworzyć, więc ich błąd nie może go zatrzymać
+        await self.cog.results_writer.enqueue(doc_game, result_docs)
+        await self.record_rankings(game.id, scores, now)
+
+    async def record_rankings(self, game_id, scores, finished_at):
+        guild_id = self.channel.guild.id
         try:
-            doc_game = game.model_dump(by_alias=True, exclude_unset=True)
-            insert_res = await games_coll.insert_one(doc_game)
-            game.id = insert_res.inserted_id
-
-            bulk_docs = []
-            for player, score in self.scores.items():
-                user_id = player.id if hasattr(player, "id") else player
-                result_obj = ResultModel(
-                    game_id=game.id,
-                    user_id=user_id,
-                    guild_id=self.channel.guild.id,
-                    score=score,
-                    finished_at=now
-                )
-                doc_res = result_obj.model_dump(by_alias=True, exclude_unset=True)
-                bulk_docs.append(doc_res)
-
-            if bulk_docs:
-                await results_coll.insert_many(bulk_docs)
+            if await self.cog.live_leaderboard.record(guild_id, game_id, scores, finished_at) is False:
+                self.cog.spawn(self.cog.live_leaderboard.ensure_loaded, guild_id)
+        except Exception as e:
+            print(f"Błąd aktualizacji rankingu serwera: {e}")
+        try:
+            await self.cog.global_stats.record(scores)
         except Exception as e:
-            self.cog.bot.log(message=e, name="MongoDB error", level=ERROR)
+            print(f"Błąd aktualizacji globalnego rankingu: {e}")
 
     async def __save_state(self):
-        key=f"quiz_session:{self.channel.guild.id}:{self.channel.id}"
-        data = {
-            "guild_id": self.channel.guild.id if self.channel and self.channel.guild else None,
-            "channel_id": self.channel.id if self.channel else None,
-            "quiz_data": self.quiz.model_dump(),
-            "players_id": [p.id for p in self.players],
-            "current_question_index": self.current_question_index,
-            "scores": {int(p.id): s for (p, s) in self.scores.items()},
-            "answered_users": list(self.answered_users),
-            "kicked_players": list(self.kicked_players),
-            "streaks": {int(p.id): st for (p, st) in self.streaks.items()},
-            "correct_answer_display_time": self.correct_answer_display_time,
-            "scoreboard_display_time": self.scoreboard_display_time,
-            "send_private_messages": self.send_private_messages,
-            "game_ended": self.game_ended,
-            "game_starter_id": self.game_starter.id if self.game_starter else None,
-            "message_id": self.message.id if self.message else None,
-        }
-
-        raw_data = json.dumps(data, default=bson.json_util.default)
-        await self.cog.redis.safe_set(key, raw_data, ex=300)
+        await self.cog.session_store.save(self)
 
     async def __remove_state(self):
-        key = f"quiz_session:{self.channel.guild.id}:{self.channel.id}"
-        await self.cog.redis.safe_delete(key)
+        await self.cog.session_store.remove(self)
 
     @classmethod
-    async def from_state(cls, raw_data, cog, bot):
-        data = json.loads(raw_data, object_hook=bson.json_util.object_hook)
+    async def from_state(cls, data, cog, bot):
         guild_id = data["guild_id"]
         channel_id = data["channel_id"]
         guild = bot.get_guild(guild_id)
@@ -416,19 +459,11 @@ class QuizSession:
 
         quiz = QuizModel(**data["quiz_data"])
 
-        players_id = data["players_id"]  # list[int]
-        players = []
-        if channel:
-            for uid in players_id:
-                mem = channel.guild.get_member(uid)
-                if mem:
-                    players.append(mem)
-
         session = cls(
             quiz=quiz,
             channel=channel,
             cog=cog,
-            players=players,
+            players=data["players_id"],
             message=None,  # tymczasowo
             game_starter=None,
             correct_answer_display_time=data["correct_answer_display_time"],
@@ -437,20 +472,18 @@ class QuizSession:
         )
         session.current_question_index = data["current_question_index"]
         session.game_ended = data["game_ended"]
-        session.scores = {}
-        for (uid_str, score_val) in data["scores"].items():
-            member = channel.guild.get_member(int(uid_str))
-            if member:
-                session.scores[member] = score_val
-
-        session.answered_users = set(data["answered_users"])
-        session.kicked_players = set(data["kicked_players"])
-        session.streaks = {}
-        for (uid_str, streak_val) in data["streaks"].items():
-            member = channel.guild.get_member(int(uid_str))
-            if member:
-                session.streaks[member] = streak_val
-
+        session.quiz_key = data["quiz_key"]
+
+        kicked = set(data["kicked_players"])
+        streaks = data["streaks"]
+        for uid, score_val in data["scores"].items():
+            session.players.restore(uid, score=score_val, streak=streaks.get(uid))
+            if uid not in kicked:
+                session.ranking.update(uid, score_val)
+        for uid in kicked:
+            session.players.restore(uid, kicked=True)
+
+        msg = None
         message_id = data.get("message_id")
         if message_id and channel:
             try:
@@ -1,3 +1,5 @@
+import asyncio
+
 import discord
 
 from bot_utils.utils import fetch_quizzes_page
@@ -10,7 +12,10 @@ class SearchView(discord.ui.View):
         total_count: int,
         page: int,
         page_size: int,
-        sort):
+        sort,
+        next_cursor=None,
+        prev_cursor=None,
+        cache=None):
         super().__init__(timeout=180)
         self.db = db
         self.user_id = user_id
@@ -19,14 +24,18 @@ class SearchView(discord.ui.View):
         self.page = page
         self.page_size = page_size
         self.sort = sort
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.cache = cache
+        self.prefetched = {}
 
         self.max_page = (self.total_count - 1) // self.page_size
 
         self.update_buttons()
 
     def update_buttons(self):
-        self.prev_button.disabled = (self.page <= 0)
-        self.next_button.disabled = (self.page >= self.max_page)
+        self.prev_button.disabled = (self.page <= 0 or self.prev_cursor is None)
+        self.next_button.disabled = (self.page >= self.max_page or self.next_cursor is None)
 
     def build_embed(self, results: list, page: int) -> discord.Embed:
         embed = discord.Embed(
@@ -55,35 +64,64 @@ class SearchView(discord.ui.View):
             color=discord.Color.red()
         )
 
-    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.primary)
-    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.page -= 1
-        self.update_buttons()
-
-        results = await fetch_quizzes_page(
+    async def fetch(self, cursor):
+        return await fetch_quizzes_page(
             db=self.db,
             user_id=self.user_id,
             search=self.search,
-            page=self.page,
             page_size=self.page_size,
             sort=self.sort,
+            cursor=cursor,
+            total=self.total_count,
+            cache=self.cache,
         )
-        embed = self.build_embed(results, self.page)
-        await interaction.response.edit_message(embed=embed, view=self)
 
-    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.primary)
-    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.page += 1
+    async def __prefetch(self, cursor):
+        try:
+            return await self.fetch(cursor)
+        except Exception:
+            return None
+
+    def prefetch(self, cursor):
+        # sąsiednia strona pobierana w tle, żeby kliknięcie zmieściło się w czasie odpowiedzi na interakcję
+        if cursor is not None and cursor not in self.prefetched:
+            self.prefetched[cursor] = asyncio.create_task(self.__prefetch(cursor))
+
+    def cancel_prefetch(self):
+        for pending in self.prefetched.values():
+            pending.cancel()
+        self.prefetched.clear()
+
+    async def show_page(self, interaction: discord.Interaction, cursor, step):
+        task = self.prefetched.pop(cursor, None)
+        if task is None or not task.done():
+            await interaction.response.defer()
+
+        page = await task if task is not None else None
+        if page is None:
+            page = await self.fetch(cursor)
+        results, next_cursor, prev_cursor, _ = page
+
+        self.cancel_prefetch()
+        self.page += step
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
         self.update_buttons()
+        self.prefetch(next_cursor if step > 0 else prev_cursor)
 
-        results = await fetch_quizzes_page(
-            db=self.db,
-            user_id=self.user_id,
-            search=self.search,
-            page=self.page,
-            page_size=self.page_size,
-            sort=self.sort,
-        )
         embed = self.build_embed(results, self.page)
-        await interaction.response.edit_message(embed=embed, view=self)
+        if interaction.response.is_done():
+            await interaction.edit_original_response(embed=embed, view=self)
+        else:
+            await interaction.response.edit_message(embed=embed, view=self)
 
+    async def on_timeout(self):
+        self.cancel_prefetch()
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.primary)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.prev_cursor, -1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.primary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.next_cursor, 1)
@@ -0,0 +1,169 @@
+import json
+from datetime import timezone
+
+import bson.json_util
+
+
+def quiz_version(quiz):
+    updated_at = quiz.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return int(updated_at.timestamp() * 1000)
+
+
+class SessionStore:
+    def __init__(self, redis, total_shards=1, ttl=300, quiz_ttl=3600):
+        self.redis = redis
+        self.total_shards = total_shards
+        self.ttl = ttl
+        self.quiz_ttl = quiz_ttl
+
+    @staticmethod
+    def session_key(guild_id, channel_id):
+        return f"quiz_session:{guild_id}:{channel_id}"
+
+    def shard_key(self, guild_id):
+        return f"quiz_sessions:shard:{(guild_id >> 22) % self.total_shards}"
+
+    @staticmethod
+    def quiz_key(quiz):
+        return f"quiz_body:{quiz.access_code}:{quiz_version(quiz)}"
+
+    def __keys(self, key):
+        # odpowiedzi z bieżącej rundy nie są zapisywane: po odtworzeniu sesja zaczyna pytanie od nowa
+        return key, f"{key}:scores", f"{key}:streaks", f"{key}:kicked"
+
+    @staticmethod
+    def __meta(session):
+        return {
+            "current_question_index": session.current_question_index,
+            "game_ended": session.game_ended,
+            "message_id": session.message.id if session.message else None,
+        }
+
+    async def create(self, session):
+        key = self.session_key(session.channel.guild.id, session.channel.id)
+        meta_key, scores_key, streaks_key, kicked_key = self.__keys(key)
+        quiz_key = self.quiz_key(session.quiz)
+
+        meta = {
+            "guild_id": session.channel.guild.id,
+            "channel_id": session.channel.id,
+            "quiz_key": quiz_key,
+            "players_id": session.players.ids.tolist(),
+            "correct_answer_display_time": session.correct_answer_display_time,
+            "scoreboard_display_time": session.scoreboard_display_time,
+            "send_private_messages": session.send_private_messages,
+            "game_starter_id": session.game_starter.id if session.game_starter else None,
+        }
+        meta.update(self.__meta(session))
+
+        pipe = self.redis.pipeline()
+        pipe.set(quiz_key, json.dumps(session.quiz.model_dump(), default=bson.json_util.default),
+                 ex=self.quiz_ttl, nx=True)
+        pipe.expire(quiz_key, self.quiz_ttl)
+        pipe.delete(meta_key, scores_key, streaks_key, kicked_key)
+        pipe.hset(meta_key, mapping={k: json.dumps(v) for k, v in meta.items()})
+        dirty = session.players.take_dirty()
+        if dirty:
+            pipe.hset(scores_key, mapping={uid: score for uid, score, _ in dirty})
+            pipe.hset(streaks_key, mapping={uid: streak for uid, _, streak in dirty})
+        kicked = session.players.kicked_ids()
+        if kicked:
+            pipe.sadd(kicked_key, *kicked)
+        for k in self.__keys(key):
+            pipe.expire(k, self.ttl)
+        pipe.sadd(self.shard_key(session.channel.guild.id), key)
+
+        session.quiz_key = quiz_key
+        await self.redis.safe_execute(pipe, key)
+
+    async def save(self, session):
+        key = self.session_key(session.channel.guild.id, session.channel.id)
+        meta_key, scores_key, streaks_key, kicked_key = self.__keys(key)
+
+        dirty = session.players.take_dirty()
+
+        pipe = self.redis.pipeline()
+        pipe.hset(meta_key, mapping={k: json.dumps(v) for k, v in self.__meta(session).items()})
+        if dirty:
+            pipe.hset(scores_key, mapping={uid: score for uid, score, _ in dirty})
+            pipe.hset(streaks_key, mapping={uid: streak for uid, _, streak in dirty})
+        for k in self.__keys(key):
+            pipe.expire(k, self.ttl)
+        pipe.expire(session.quiz_key, self.quiz_ttl)
+        await self.redis.safe_execute(pipe, key)
+
+    async def kick(self, session, user_id):
+        key = self.session_key(session.channel.guild.id, session.channel.id)
+        meta_key, scores_key, streaks_key, kicked_key = self.__keys(key)
+        pipe = self.redis.pipeline()
+        pipe.sadd(kicked_key, user_id)
+        pipe.expire(kicked_key, self.ttl)
+        pipe.hdel(scores_key, user_id)
+        pipe.hdel(streaks_key, user_id)
+        await self.redis.safe_execute(pipe, key)
+
+    async def remove(self, session):
+        key = self.session_key(session.channel.guild.id, session.channel.id)
+        pipe = self.redis.pipeline()
+        pipe.delete(*self.__keys(key))
+        pipe.srem(self.shard_key(session.channel.guild.id), key)
+        await self.redis.safe_execute(pipe, key)
+
+    async def shard_sessions(self, shard_id):
+        return await self.redis.safe_sscan(f"quiz_sessions:shard:{shard_id}")
+
+    async def forget(self, shard_id, keys):
+        pipe = self.redis.pipeline()
+        pipe.srem(f"quiz_sessions:shard:{shard_id}", *keys)
+        await self.redis.safe_execute(pipe, f"quiz_sessions:shard:{shard_id}")
+
+    async def load(self, key):
+        return (await self.load_many([key]))[0]
+
+    async def load_many(self, keys):
+        pipe = self.redis.pipeline()
+        for key in keys:
+            meta_key, scores_key, streaks_key, kicked_key = self.__keys(key)
+            pipe.hgetall(meta_key)
+            pipe.hgetall(scores_key)
+            pipe.hgetall(streaks_key)
+            pipe.smembers(kicked_key)
+        result = await self.redis.safe_execute(pipe, "quiz_session:*")
+        if not result:
+            return [None] * len(keys)
+
+        states = []
+        for i in range(len(keys)):
+            meta, scores, streaks, kicked = result[i * 4:i * 4 + 4]
+            if not meta:
+                states.append(None)
+                continue
+            data = {k: json.loads(v) for k, v in meta.items()}
+            data["scores"] = {int(uid): int(s) for uid, s in scores.items()}
+            data["streaks"] = {int(uid): int(st) for uid, st in streaks.items()}
+            data["kicked_players"] = [int(uid) for uid in kicked]
+            states.append(data)
+
+        # kilka sesji może grać ten sam quiz, więc każdą treść pobieramy raz
+        quiz_keys = list({data["quiz_key"] for data in states if data})
+        if not quiz_keys:
+            return states
+        pipe = self.redis.pipeline()
+        pipe.mget(quiz_keys)
+        result = await self.redis.safe_execute(pipe, "quiz_body:*")
+        bodies = dict(zip(quiz_keys, result[0])) if result else {}
+
+        quizzes = {}
+        for i, data in enumerate(states):
+            if not data:
+                continue
+            raw_quiz = bodies.get(data["quiz_key"])
+            if raw_quiz is None:
+                states[i] = None
+                continue
+            if data["quiz_key"] not in quizzes:
+                quizzes[data["quiz_key"]] = json.loads(raw_quiz, object_hook=bson.json_util.object_hook)
+            data["quiz_data"] = quizzes[data["quiz_key"]]
+        return states
@@ -14,7 +14,7 @@ class RedisHelper:
             await self.client.set(key, serialized, ex=ex)
         except (aioredis.RedisError, ConnectionError) as e:
             self.logger.name = "RedisError"
-            self.logger.log(mgs=f"[REDIS] Nie udało się zapisać {key}: {e}",level=ERROR)
+            self.logger.log(msg=f"[REDIS] Nie udało się zapisać {key}: {e}",level=ERROR)
 
 
     async def safe_get(self, key: str):
@@ -28,6 +28,14 @@ class RedisHelper:
             self.logger.log(msg=f"[REDIS] Nie udało się odczytać {key}: {e}",level=ERROR)
             return None
 
+    async def safe_get_raw(self, key: str):
+        try:
+            return await self.client.get(key)
+        except (aioredis.RedisError, ConnectionError) as e:
+            self.logger.name = "RedisError"
+            self.logger.log(msg=f"[REDIS] Nie udało się odczytać {key}: {e}",level=ERROR)
+            return None
+
     async def safe_keys(self, key: str):
         try:
             raw = await self.client.keys(key)
@@ -39,9 +47,28 @@ class RedisHelper:
             self.logger.log(msg=f"[REDIS] Nie udało się odczytać {key}: {e}",level=ERROR)
             return None
 
+    async def safe_sscan(self, key: str, count=500):
+        try:
+            return [member async for member in self.client.sscan_iter(key, count=count)]
+        except (aioredis.RedisError, ConnectionError) as e:
+            self.logger.name = "RedisError"
+            self.logger.log(msg=f"[REDIS] Nie udało się odczytać {key}: {e}",level=ERROR)
+            return None
+
     async def safe_delete(self, key: str):
         try:
             await self.client.delete(key)
         except (aioredis.RedisError, ConnectionError) as e:
             self.logger.name = "RedisError"
-            self.logger.log(msg=f"[REDIS] Nie udało się usunąć klucza {key}: {e}",level=ERROR)
\ No newline at end of file
+            self.logger.log(msg=f"[REDIS] Nie udało się usunąć klucza {key}: {e}",level=ERROR)
+
+    def pipeline(self):
+        return self.client.pipeline(transaction=False)
+
+    async def safe_execute(self, pipe, key: str):
+        try:
+            return await pipe.execute()
+        except (aioredis.RedisError, ConnectionError) as e:
+            self.logger.name = "RedisError"
+            self.logger.log(msg=f"[REDIS] Nie udało się wykonać operacji na {key}: {e}",level=ERROR)
+            return None
@@ -0,0 +1,132 @@
+import asyncio
+import io
+import time
+from urllib.parse import urlparse, parse_qs
+
+import discord
+
+
+class AttachmentRegistry:
+    # obrazy trafiają raz na osobny kanał-magazyn, którego wiadomości nigdy nie są edytowane;
+    # załącznik na wiadomości gry znika przy jej kolejnej edycji, więc jego adresu nie wolno zapamiętać.
+    # Adres z martwym obrazem nie powoduje błędu edycji (Discord po prostu nie pokaże obrazu), dlatego:
+    # - ważność adresu wyznacza głównie parametr ex= podpisanego linku CDN (z zapasem margin),
+    # - co verify_interval instancja pobiera wiadomość z magazynu; zwraca ona świeży podpisany link,
+    #   a usunięta wiadomość lub załącznik unieważnia wpis i obraz jest wysyłany ponownie.
+    def __init__(self, redis, bot=None, channel_id=None, default_ttl=12 * 3600, margin=900,
+                 verify_interval=600, retry_delay=30, max_retry_delay=900):
+        self.redis = redis
+        self.bot = bot
+        self.channel_id = channel_id
+        self.default_ttl = default_ttl
+        self.margin = margin
+        self.verify_interval = verify_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.urls = {}
+        self.checked = {}
+        self.pending = {}
+        self.failures = 0
+        self.retry_at = 0.0
+
+    @staticmethod
+    def filename(image_id):
+        return f"question_{image_id}.png"
+
+    def __expires_at(self, url):
+        try:
+            expires = parse_qs(urlparse(url).query).get("ex")
+            if expires:
+                return int(expires[0], 16) - self.margin
+        except ValueError:
+            pass
+        return int(time.time()) + self.default_ttl
+
+    def __once(self, key, coro_fn, *args):
+        # równoległe pytania o ten sam obraz czekają na jedno wysłanie lub sprawdzenie
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.create_task(coro_fn(*args))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        return asyncio.shield(task)
+
+    async def get(self, image_id):
+        key = str(image_id)
+        entry = self.urls.get(key)
+        if entry is None:
+            entry = await self.redis.safe_get(f"image_cdn:{key}")
+            if entry is None:
+                return None
+            self.urls[key] = entry
+
+        expired = entry["expires_at"] <= time.time()
+        if expired or time.time() - self.checked.get(key, 0) >= self.verify_interval:
+            return await self.__once(("verify", key), self.__verify, image_id, entry)
+        return entry["url"]
+
+    async def __verify(self, image_id, entry):
+        key = str(image_id)
+        if entry.get("message_id") is None or self.channel_id is None:
+            await self.invalidate(image_id)
+            return None
+        try:
+            channel = await self.__channel()
+            message = await channel.fetch_message(entry["message_id"])
+        except discord.NotFound:
+            await self.invalidate(image_id)
+            return None
+        except Exception as e:
+            # magazyn chwilowo niedostępny: niewygasły adres zostaje, sprawdzimy go przy kolejnym pytaniu
+            print(f"Błąd sprawdzania obrazu na kanale z obrazami: {e}")
+            if entry["expires_at"] <= time.time():
+                return None
+            self.checked[key] = time.time()
+            return entry["url"]
+
+        url = await self.register(image_id, message)
+        if url is None:
+            await self.invalidate(image_id)
+        return url
+
+    async def __channel(self):
+        return self.bot.get_channel(self.channel_id) or await self.bot.fetch_channel(self.channel_id)
+
+    async def upload(self, image_id, data):
+        if self.channel_id is None or time.time() < self.retry_at:
+            return None
+        return await self.__once(("upload", str(image_id)), self.__upload, image_id, data)
+
+    async def __upload(self, image_id, data):
+        try:
+            channel = await self.__channel()
+            message = await channel.send(file=discord.File(io.BytesIO(data), filename=self.filename(image_id)))
+        except Exception as e:
+            # brak kanału lub uprawnień nie minie od razu; do czasu retry_at obrazy idą jako załączniki gry
+            self.failures += 1
+            delay = min(self.retry_delay * 2 ** (self.failures - 1), self.max_retry_delay)
+            self.retry_at = time.time() + delay
+            print(f"Błąd wysyłania obrazu na kanał z obrazami, ponowienie za {delay}s: {e}")
+            return None
+        self.failures = 0
+        return await self.register(image_id, message)
+
+    async def register(self, image_id, message):
+        name = self.filename(image_id)
+        attachment = next((a for a in message.attachments if a.filename == name), None)
+        if attachment is None:
+            return None
+
+        entry = {"url": attachment.url, "expires_at": self.__expires_at(attachment.url), "message_id": message.id}
+        self.checked[str(image_id)] = time.time()
+        ttl = entry["expires_at"] - int(time.time())
+        if ttl <= 0:
+            return attachment.url
+        self.urls[str(image_id)] = entry
+        await self.redis.safe_set(f"image_cdn:{image_id}", entry, ex=ttl)
+        return attachment.url
+
+    async def invalidate(self, image_id):
+        self.urls.pop(str(image_id), None)
+        self.checked.pop(str(image_id), None)
+        await self.redis.safe_delete(f"image_cdn:{image_id}")
@@ -0,0 +1,173 @@
+import asyncio
+import bisect
+import heapq
+import math
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from logging import ERROR, INFO
+
+from pymongo import ASCENDING, IndexModel
+
+from bot_utils.search_index import normalize
+
+MAX_CHOICES = 25
+MAX_CHOICE_LENGTH = 100
+SCAN_LIMIT = 2000
+RECENT_PER_GUILD = 20
+RECENT_WEIGHT = 10.0
+CODE_MATCH_WEIGHT = 100.0
+# zegary instancji panelu i bota mogą się rozjeżdżać, więc każde odświeżenie zachodzi na poprzednie
+SYNC_OVERLAP = timedelta(seconds=60)
+
+PROJECTION = {"title": 1, "access_code": 1, "user_id": 1, "is_private": 1, "is_active": 1, "play_count": 1}
+
+
+class QuizEntry:
+    __slots__ = ("code", "title", "words", "user_id", "is_private", "play_count", "keys")
+
+    def __init__(self, doc):
+        self.code = doc["access_code"]
+        self.title = doc.get("title", "")
+        self.words = normalize(self.title)
+        self.user_id = doc.get("user_id")
+        self.is_private = doc.get("is_private", False)
+        self.play_count = doc.get("play_count", 0)
+        self.keys = {self.code.lower(), *self.words}
+
+    def visible_to(self, user_id):
+        return not self.is_private or self.user_id == user_id
+
+    def matches(self, words):
+        return all(self.code.lower().startswith(word) or any(title_word.startswith(word) for title_word in self.words)
+                   for word in words)
+
+
+class AutocompleteIndex:
+    # indeks prefiksów tytułów i kodów quizów w pamięci: podpowiedzi nie odpytują Mongo przy każdym
+    # naciśnięciu klawisza, a zmiany dociągane są w tle po polu changed_at
+    def __init__(self, collection, logger, refresh_interval=30.0):
+        self.collection = collection
+        self.logger = logger
+        self.refresh_interval = refresh_interval
+
+        self.entries = {}
+        self.keys = []
+        self.popular = []
+        self.recent = defaultdict(lambda: deque(maxlen=RECENT_PER_GUILD))
+        self.synced_at = None
+        self.worker = None
+
+    def __log(self, message, level):
+        self.logger.name = "Autocomplete"
+        self.logger.log(msg=message, level=level)
+
+    async def start(self):
+        if self.worker is not None:
+            return
+        try:
+            await self.load()
+        except Exception as e:
+            self.__log(f"Nie udało się wczytać indeksu podpowiedzi: {e}", ERROR)
+        self.worker = asyncio.create_task(self.__run())
+
+    def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+    async def __run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if self.synced_at is None:
+                    await self.load()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                self.__log(f"Nie udało się odświeżyć indeksu podpowiedzi: {e}", ERROR)
+
+    async def load(self):
+        started = datetime.now(timezone.utc)
+        entries = {}
+        async for doc in self.collection.find({"is_active": True}, PROJECTION):
+            entries[doc["access_code"]] = QuizEntry(doc)
+
+        self.entries = entries
+        self.keys = sorted((key, code) for code, entry in entries.items() for key in entry.keys)
+        self.update_popular()
+        self.synced_at = started
+        self.__log(f"Wczytano {len(entries)} quizów do podpowiedzi", INFO)
+
+    async def refresh(self):
+        started = datetime.now(timezone.utc)
+        changed = 0
+        async for doc in self.collection.find({"changed_at": {"$gte": self.synced_at - SYNC_OVERLAP}}, PROJECTION):
+            self.apply(doc)
+            changed += 1
+        if changed:
+            self.update_popular()
+        self.synced_at = started
+
+    def apply(self, doc):
+        code = doc["access_code"]
+        old = self.entries.pop(code, None)
+        if old is not None:
+            for key in old.keys:
+                index = bisect.bisect_left(self.keys, (key, code))
+                if index < len(self.keys) and self.keys[index] == (key, code):
+                    del self.keys[index]
+
+        if doc.get("is_active", True):
+            entry = QuizEntry(doc)
+            self.entries[code] = entry
+            for key in entry.keys:
+                bisect.insort(self.keys, (key, code))
+
+    def update_popular(self):
+        self.popular = [entry.code for entry in
+                        heapq.nlargest(MAX_CHOICES * 4, self.entries.values(), key=lambda entry: entry.play_count)]
+
+    def touch(self, guild_id, code):
+        recent = self.recent[guild_id]
+        if code in recent:
+            recent.remove(code)
+        recent.appendleft(code)
+
+    def prefix_range(self, prefix):
+        return bisect.bisect_left(self.keys, (prefix,)), bisect.bisect_left(self.keys, (prefix + "\uffff",))
+
+    def prefix_codes(self, words):
+        # kandydaci ze słowa o najwęższym zakresie kluczy, pozostałe słowa tylko zawężają wynik
+        start, end = min((self.prefix_range(word) for word in words), key=lambda bounds: bounds[1] - bounds[0])
+        return {code for _, code in self.keys[start:min(end, start + SCAN_LIMIT)]}
+
+    def search(self, query, user_id, guild_id=None, limit=MAX_CHOICES):
+        words = normalize(query)
+        recent = {code: rank for rank, code in enumerate(self.recent.get(guild_id, ()))}
+        candidates = set(recent) | set(self.popular)
+        if words:
+            candidates |= self.prefix_codes(words)
+
+        query_code = query.strip().lower()
+        scored = []
+        for code in candidates:
+            entry = self.entries.get(code)
+            if entry is None or not entry.visible_to(user_id):
+                continue
+            if words and not entry.matches(words):
+                continue
+            score = math.log1p(entry.play_count)
+            if code in recent:
+                score += RECENT_WEIGHT * (1 - recent[code] / RECENT_PER_GUILD)
+            if code.lower() == query_code:
+                score += CODE_MATCH_WEIGHT
+            scored.append((score, entry))
+        return [entry for _, entry in heapq.nlargest(limit, scored, key=lambda item: item[0])]
+
+
+def choice_label(entry):
+    suffix = f" | {entry.code}"
+    return entry.title[:MAX_CHOICE_LENGTH - len(suffix)] + suffix
+
+
+CHANGED_INDEX = IndexModel([("changed_at", ASCENDING)], name="changed_at")
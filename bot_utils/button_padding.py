@@ -1,4 +1,7 @@
-import math
+from functools import lru_cache
+import os
+import sys
+from array import array
 
 CHAR_MAP = {
     '0': 8.67,
@@ -119,28 +122,116 @@ PAD_MAP = [
     (' ', 1.05)
 ]
 
-def calc_string_width(string,char_map=CHAR_MAP):
-    total = 0.0
-    for char in string:
-        total += char_map.get(char,6.7)
-    return total
+DEFAULT_WIDTH = 6.7
+WIDE_WIDTH = 14
+EMOJI_WIDTH = 19.25
+WIDTH_SCALE = 100
+WIDTHS_PATH = os.path.join(os.path.dirname(__file__), "glyph_widths.bin")
 
-def pad_string(string,width):
-    def _pad(_width, pad_map=PAD_MAP):
-        result = ""
-        remaining = _width
-        for (char, char_w) in pad_map:
-            if remaining < 0.5:
+
+def load_widths(path=WIDTHS_PATH):
+    # szerokości znaków BMP w setnych piksela (uint16, little-endian), generowane przez tools/generate_glyph_widths.py
+    widths = array("H")
+    try:
+        with open(path, "rb") as f:
+            widths.frombytes(f.read())
+        if sys.byteorder == "big":
+            widths.byteswap()
+    except OSError:
+        widths = array("H", [round(DEFAULT_WIDTH * WIDTH_SCALE)]) * 0x10000
+        for char, width in CHAR_MAP.items():
+            if len(char) == 1:
+                widths[ord(char)] = round(width * WIDTH_SCALE)
+    return widths
+
+
+WIDTHS = load_widths()
+
+
+def astral_width(char):
+    code_point = ord(char)
+    if 0x1F000 <= code_point <= 0x1FAFF:
+        return EMOJI_WIDTH
+    return WIDE_WIDTH
+
+
+def calc_string_width(string):
+    try:
+        return sum(map(WIDTHS.__getitem__, map(ord, string))) / WIDTH_SCALE
+    except IndexError:
+        total = 0.0
+        for char in string:
+            code_point = ord(char)
+            total += WIDTHS[code_point] / WIDTH_SCALE if code_point < 0x10000 else astral_width(char)
+        return total
+
+
+def calc_string_widths(labels):
+    return [calc_string_width(label) for label in labels]
+
+MAX_LABEL_LENGTH = 80
+PAD_SPAN = 2 * round(PAD_MAP[0][1] * WIDTH_SCALE)
+
+
+def build_pad_table(pad_map=PAD_MAP, span=PAD_SPAN):
+    # dla każdej szerokości (w setnych piksela) poniżej span: kombinacja spacji o najmniejszym błędzie,
+    # przy remisie najkrótsza; większe szerokości dopełniamy najpierw spacjami ideograficznymi
+    units = [(char, round(char_w * WIDTH_SCALE)) for char, char_w in pad_map]
+    limit = span + max(unit for _, unit in units)
+    counts = [None] * (limit + 1)
+    last = [None] * (limit + 1)
+    counts[0] = 0
+    for total in range(1, limit + 1):
+        for char, unit in units:
+            if unit <= total and counts[total - unit] is not None:
+                if counts[total] is None or counts[total - unit] + 1 < counts[total]:
+                    counts[total] = counts[total - unit] + 1
+                    last[total] = (char, unit)
+
+    def padding(total):
+        result = []
+        while total > 0:
+            char, unit = last[total]
+            result.append(char)
+            total -= unit
+        return "".join(sorted(result, key=lambda c: -dict(units)[c]))
+
+    table = []
+    for target in range(span):
+        best = None
+        for delta in range(limit):
+            for total in (target - delta, target + delta):
+                if 0 <= total <= limit and counts[total] is not None:
+                    if best is None or counts[total] < counts[best]:
+                        best = total
+            if best is not None:
                 break
-            times = math.floor(remaining / char_w)
-            if times > 0:
-                result += char * times
-                remaining -= (char_w * times)
-        return result
+        table.append(padding(best))
+    return table
+
 
+PAD_TABLE = build_pad_table()
+PAD_BULK = PAD_MAP[0]
+
+
+def pad_for(width):
+    target = max(0, round(width * WIDTH_SCALE))
+    bulk_unit = round(PAD_BULK[1] * WIDTH_SCALE)
+    bulk = 0
+    if target >= PAD_SPAN:
+        bulk = (target - PAD_SPAN) // bulk_unit + 1
+        target -= bulk * bulk_unit
+    return PAD_BULK[0] * bulk + PAD_TABLE[target]
+
+
+@lru_cache(maxsize=4096)
+def pad_string(string,width):
     current_width = calc_string_width(string)
     if current_width >= width:
         return F"\u200b{string}\u200b"
 
-    pad_width = (width-current_width)
-    return f"\u200b{string}{_pad(pad_width)}\u200b"
+    padding = pad_for(width - current_width)
+    free = MAX_LABEL_LENGTH - len(string) - 2
+    if len(padding) > free:
+        padding = padding[:max(free, 0)]
+    return f"\u200b{string}{padding}\u200b"
@@ -0,0 +1,84 @@
+import asyncio
+
+import discord
+
+
+class ChannelBuckets:
+    def __init__(self, slow_edit=1.5):
+        self.slow_edit = slow_edit
+        self.blocked_until = {}
+
+    def wait_time(self, channel_id):
+        until = self.blocked_until.get(channel_id)
+        if until is None:
+            return 0
+        delay = until - asyncio.get_running_loop().time()
+        if delay <= 0:
+            del self.blocked_until[channel_id]
+            return 0
+        return delay
+
+    def penalize(self, channel_id, retry_after):
+        until = asyncio.get_running_loop().time() + retry_after
+        if until > self.blocked_until.get(channel_id, 0):
+            self.blocked_until[channel_id] = until
+
+    def record(self, channel_id, latency):
+        # discord.py czeka na zwolnienie bucketu w środku edit(), więc długa edycja oznacza limit
+        if latency >= self.slow_edit:
+            self.penalize(channel_id, latency / 2)
+
+
+class MessageEditScheduler:
+    def __init__(self, message, buckets: ChannelBuckets):
+        self.message = message
+        self.buckets = buckets
+        self.pending = None
+        self.worker = None
+
+    async def edit(self, essential=True, **kwargs):
+        channel_id = self.message.channel.id
+        if not essential and self.buckets.wait_time(channel_id) > 0:
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        if self.pending is not None:
+            _, superseded = self.pending
+            if not superseded.done():
+                superseded.set_result(None)
+        self.pending = (kwargs, future)
+
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self.__run())
+        return await future
+
+    async def __run(self):
+        loop = asyncio.get_running_loop()
+        channel_id = self.message.channel.id
+        while self.pending is not None:
+            kwargs, future = self.pending
+            self.pending = None
+
+            delay = self.buckets.wait_time(channel_id)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self.pending is not None:
+                    if not future.done():
+                        future.set_result(None)
+                    continue
+
+            start = loop.time()
+            try:
+                message = await self.message.edit(**kwargs)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    retry_after = float(e.response.headers.get("Retry-After", 1))
+                    self.buckets.penalize(channel_id, retry_after)
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            self.buckets.record(channel_id, loop.time() - start)
+            self.message = message
+            if not future.done():
+                future.set_result(message)
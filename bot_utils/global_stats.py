@@ -0,0 +1,80 @@
+import time
+
+from bot_utils.score_sketch import moves, share_below
+
+TOTALS_KEY = "global:totals"
+GAMES_KEY = "global:games"
+TOP_KEY = "global:top"
+SKETCH_KEY = "global:sketch"
+TOP_SIZE = 100
+
+
+class GlobalStats:
+    # ranking wszystkich serwerów: sumy graczy w haszach Redisa, ograniczona lista TOP_SIZE najlepszych
+    # i szkic rozkładu sum (po jednym wpisie na gracza), wspólny dla wszystkich instancji
+    def __init__(self, redis, cache_ttl=60.0):
+        self.redis = redis
+        self.cache_ttl = cache_ttl
+        self.sketch = None
+        self.sketch_at = 0.0
+
+    async def record(self, scores):
+        if not scores:
+            return
+
+        pipe = self.redis.pipeline()
+        for user_id, score in scores:
+            pipe.hincrby(TOTALS_KEY, user_id, score)
+            pipe.hincrby(GAMES_KEY, user_id, 1)
+        result = await self.redis.safe_execute(pipe, TOTALS_KEY)
+        if result is None:
+            return
+
+        # HINCRBY zwraca sumę po tej grze, więc poprzednia suma jest dokładna także przy równoległych grach
+        totals = {}
+        pipe = self.redis.pipeline()
+        for (user_id, score), total, games in zip(scores, result[::2], result[1::2]):
+            totals[user_id] = total
+            for key, delta in moves(total - score, total, games == 1).items():
+                pipe.hincrby(SKETCH_KEY, key, delta)
+
+        # sumy tylko rosną, więc GT chroni przed nadpisaniem nowszej sumy przez równoległą grę
+        pipe.zadd(TOP_KEY, totals, gt=True)
+        pipe.zremrangebyrank(TOP_KEY, 0, -(TOP_SIZE + 1))
+        await self.redis.safe_execute(pipe, TOP_KEY)
+
+    async def top(self, limit=10):
+        pipe = self.redis.pipeline()
+        pipe.zrevrange(TOP_KEY, 0, limit - 1, withscores=True)
+        result = await self.redis.safe_execute(pipe, TOP_KEY)
+        if result is None:
+            return None
+        return [(int(member), int(score)) for member, score in result[0]]
+
+    async def sketch_counts(self):
+        if self.sketch is not None and time.monotonic() - self.sketch_at < self.cache_ttl:
+            return self.sketch
+
+        pipe = self.redis.pipeline()
+        pipe.hgetall(SKETCH_KEY)
+        result = await self.redis.safe_execute(pipe, SKETCH_KEY)
+        if result is None:
+            return self.sketch or {}
+        self.sketch = {int(key): int(count) for key, count in result[0].items()}
+        self.sketch_at = time.monotonic()
+        return self.sketch
+
+    async def player(self, user_id):
+        # (suma punktów, liczba gier, miejsce w globalnej czołówce albo None, część graczy z mniejszą sumą)
+        pipe = self.redis.pipeline()
+        pipe.hget(TOTALS_KEY, user_id)
+        pipe.hget(GAMES_KEY, user_id)
+        pipe.zrevrank(TOP_KEY, user_id)
+        result = await self.redis.safe_execute(pipe, TOTALS_KEY)
+        if result is None or result[0] is None:
+            return None
+
+        total, games = int(result[0]), int(result[1] or 0)
+        rank = result[2] + 1 if result[2] is not None else None
+        share = share_below(await self.sketch_counts(), total)
+        return total, games, rank, share
@@ -0,0 +1,57 @@
+import asyncio
+import io
+from collections import OrderedDict
+
+
+class ImageCache:
+    def __init__(self, fs, max_bytes=64 * 1024 * 1024):
+        self.fs = fs
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.images = OrderedDict()
+        self.pending = {}
+
+    async def get(self, image_id):
+        data = self.images.get(image_id)
+        if data is not None:
+            self.images.move_to_end(image_id)
+            return data
+
+        task = self.pending.get(image_id)
+        if task is None:
+            task = self.prefetch(image_id)
+        return await asyncio.shield(task)
+
+    def prefetch(self, image_id):
+        if image_id is None or image_id in self.images:
+            return None
+        task = self.pending.get(image_id)
+        if task is None:
+            task = asyncio.create_task(self.__download(image_id))
+            self.pending[image_id] = task
+            task.add_done_callback(self.__consume_error)
+        return task
+
+    async def __download(self, image_id):
+        try:
+            out = io.BytesIO()
+            await self.fs.download_to_stream(image_id, out)
+            data = out.getvalue()
+            self.__store(image_id, data)
+            return data
+        finally:
+            self.pending.pop(image_id, None)
+
+    def __store(self, image_id, data):
+        if len(data) > self.max_bytes:
+            return
+        self.images[image_id] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.images.popitem(last=False)
+            self.size -= len(evicted)
+
+    @staticmethod
+    def __consume_error(task):
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+from bot_utils.utils import get_row
+from bot_utils.button_padding import calc_string_widths, pad_string
+
+
+class QuestionLayout:
+    __slots__ = ("labels", "rows", "max_width")
+
+    def __init__(self, options):
+        widths = calc_string_widths([opt.option for opt in options])
+        self.max_width = max(widths, default=0.0)
+
+        self.labels = [pad_string(opt.option, self.max_width) for opt in options]
+        self.rows = [get_row(self.max_width, idx) for idx in range(len(options))]
+
+
+class QuizLayoutCache:
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.layouts = OrderedDict()
+        self.versions = {}
+
+    def get(self, quiz):
+        key = (quiz.access_code, quiz.updated_at)
+        layout = self.layouts.get(key)
+        if layout is not None:
+            self.layouts.move_to_end(key)
+            return layout
+
+        old_version = self.versions.get(quiz.access_code)
+        if old_version is not None and old_version != quiz.updated_at:
+            self.layouts.pop((quiz.access_code, old_version), None)
+
+        layout = [QuestionLayout(question.options) for question in quiz.questions]
+        self.layouts[key] = layout
+        self.versions[quiz.access_code] = quiz.updated_at
+
+        if len(self.layouts) > self.max_size:
+            (code, version), _ = self.layouts.popitem(last=False)
+            if self.versions.get(code) == version:
+                del self.versions[code]
+        return layout
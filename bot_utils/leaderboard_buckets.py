@@ -0,0 +1,70 @@
+import heapq
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+ALL_TIME = "all"
+# ponowiony zapis tej samej gry nie może podbić wyników drugi raz, więc kubełek pamięta zapisane gry:
+# dzienny wszystkie gry swojego dnia, całościowy gry z ostatnich RETRY_DAYS dni (applied.<dzień>).
+# Tyle najdłużej gra może czekać w buforze ResultsWriter na ponowienie zapisu; starsze dni są usuwane
+# przy kolejnych zapisach.
+RETRY_DAYS = 7
+
+BUCKET_INDEX = IndexModel([("guild_id", ASCENDING), ("day", ASCENDING)], name="guild_day")
+
+
+def bucket_day(finished_at):
+    return datetime(finished_at.year, finished_at.month, finished_at.day)
+
+
+def bucket_id(guild_id, day=None):
+    return f"{guild_id}:{day_name(day) if day else ALL_TIME}"
+
+
+def day_name(day):
+    return day.strftime('%Y-%m-%d')
+
+
+def bucket_updates(game_doc, result_docs):
+    scores = Counter()
+    for doc in result_docs:
+        scores[str(doc["user_id"])] += doc["score"]
+    if not scores:
+        return []
+
+    guild_id = game_doc["guild_id"]
+    game_id = game_doc["_id"]
+    day = bucket_day(game_doc["finished_at"])
+    applied = f"applied.{day_name(day)}"
+    increments = {f"scores.{user_id}": score for user_id, score in scores.items()}
+    # dni starsze niż okno ponowień, liczone od dziś; bez dnia gry, bo tej samej ścieżki
+    # nie można w jednej operacji usunąć i uzupełnić
+    today = bucket_day(datetime.now(timezone.utc))
+    expired = {f"applied.{day_name(today - timedelta(days=offset))}": ""
+               for offset in range(RETRY_DAYS + 1, 4 * RETRY_DAYS + 1)
+               if today - timedelta(days=offset) != day}
+    # gra już zapisana w kubełku nie pasuje do filtra, a upsert kończy się błędem duplikatu _id
+    return [
+        UpdateOne({"_id": bucket_id(guild_id, day), "games": {"$ne": game_id}},
+                  {"$inc": increments, "$push": {"games": game_id},
+                   "$setOnInsert": {"guild_id": guild_id, "day": day}}, upsert=True),
+        UpdateOne({"_id": bucket_id(guild_id), applied: {"$ne": game_id}},
+                  {"$inc": increments, "$push": {applied: game_id}, "$unset": {"games": "", **expired},
+                   "$setOnInsert": {"guild_id": guild_id, "day": None}}, upsert=True),
+    ]
+
+
+async def top_scores(collection, guild_id, days=None, limit=10):
+    if days is None:
+        docs = await collection.find({"_id": bucket_id(guild_id)}, {"scores": 1}).to_list(1)
+    else:
+        # dni kalendarzowe UTC: dzisiejszy kubełek i days - 1 poprzednich
+        today = bucket_day(datetime.now(timezone.utc))
+        cutoff = today - timedelta(days=days - 1)
+        docs = await collection.find({"guild_id": guild_id, "day": {"$gte": cutoff}}, {"scores": 1}).to_list(days)
+
+    totals = Counter()
+    for doc in docs:
+        totals.update(doc.get("scores", {}))
+    return [(int(user_id), score) for user_id, score in heapq.nlargest(limit, totals.items(), key=lambda item: item[1])]
@@ -0,0 +1,171 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from bot_utils.leaderboard_buckets import bucket_day, bucket_id
+
+DAY_TTL = 32 * 24 * 3600
+VIEW_TTL = 30
+MAX_DAYS = 30
+
+
+class LiveLeaderboard:
+    # rankingi w zbiorach uporządkowanych Redisa: dzienne klucze na serwer, tydzień i miesiąc
+    # składane przez ZUNIONSTORE i trzymane krótko; źródłem prawdy pozostają kubełki w MongoDB
+    # razem z grami czekającymi w ResultsWriter (pending zwraca je dla serwera)
+    def __init__(self, redis, buckets, pending=None):
+        self.redis = redis
+        self.buckets = buckets
+        self.pending = pending
+        self.locks = {}
+        # gry z bufora dodane przez ostatnią przebudowę; ich późniejszy record nie może ich policzyć drugi raz
+        self.included = {}
+
+    @staticmethod
+    def day_key(guild_id, day):
+        return f"leaderboard:{guild_id}:day:{day.strftime('%Y-%m-%d')}"
+
+    @staticmethod
+    def all_key(guild_id):
+        return f"leaderboard:{guild_id}:all"
+
+    @staticmethod
+    def view_key(guild_id, days):
+        return f"leaderboard:{guild_id}:view:{days}"
+
+    @staticmethod
+    def loaded_key(guild_id):
+        return f"leaderboard:{guild_id}:loaded"
+
+    def window_keys(self, guild_id, days, today=None):
+        today = today or bucket_day(datetime.now(timezone.utc))
+        return [self.day_key(guild_id, today - timedelta(days=offset)) for offset in range(days)]
+
+    def lock(self, guild_id):
+        # serwer obsługuje jedna instancja, więc lokalna blokada wystarcza, żeby przebudowa nie przeplatała się z zapisem
+        if guild_id not in self.locks:
+            self.locks[guild_id] = asyncio.Lock()
+        return self.locks[guild_id]
+
+    async def record(self, guild_id, game_id, scores, finished_at):
+        # zwraca False, gdy brakuje znacznika (klucze mogą być niepełne i trzeba je przebudować), None przy błędzie Redisa
+        async with self.lock(guild_id):
+            included = self.included.get(guild_id)
+            if included and game_id in included:
+                included.discard(game_id)
+                return True
+            return await self.__record(guild_id, scores, finished_at)
+
+    async def ensure_loaded(self, guild_id):
+        async with self.lock(guild_id):
+            pipe = self.redis.pipeline()
+            pipe.exists(self.loaded_key(guild_id))
+            state = await self.redis.safe_execute(pipe, self.loaded_key(guild_id))
+            if state is None:
+                return False
+            return bool(state[0]) or await self.rebuild(guild_id)
+
+    async def __record(self, guild_id, scores, finished_at):
+        day_key = self.day_key(guild_id, bucket_day(finished_at))
+        pipe = self.redis.pipeline()
+        pipe.expire(self.loaded_key(guild_id), DAY_TTL)
+        for user_id, score in scores:
+            pipe.zincrby(day_key, score, user_id)
+            pipe.zincrby(self.all_key(guild_id), score, user_id)
+        pipe.expire(day_key, DAY_TTL)
+        pipe.delete(*(self.view_key(guild_id, days) for days in (7, MAX_DAYS)))
+        result = await self.redis.safe_execute(pipe, day_key)
+        return None if result is None else bool(result[0])
+
+    async def rebuild(self, guild_id):
+        today = bucket_day(datetime.now(timezone.utc))
+        cutoff = today - timedelta(days=MAX_DAYS)
+        docs = await self.buckets.find(
+            {"$or": [{"_id": bucket_id(guild_id)}, {"guild_id": guild_id, "day": {"$gte": cutoff}}]},
+            {"day": 1, "scores": 1, "games": 1, "applied": 1}).to_list(None)
+
+        scores = {}
+        applied = {}
+        for doc in docs:
+            if doc.get("day"):
+                key = self.day_key(guild_id, doc["day"])
+                applied[key] = set(doc.get("games") or [])
+            else:
+                key = self.all_key(guild_id)
+                applied[key] = {game_id for games in (doc.get("applied") or {}).values() for game_id in games}
+            scores[key] = Counter(doc.get("scores") or {})
+
+        # gry z bufora ResultsWriter, których kubełki jeszcze nie zawierają
+        included = set()
+        for entry in self.pending(guild_id) if self.pending else []:
+            game = entry["game"]
+            included.add(game["_id"])
+            day = bucket_day(game["finished_at"])
+            keys = [self.all_key(guild_id)]
+            if day >= cutoff:
+                keys.append(self.day_key(guild_id, day))
+            for key in keys:
+                if game["_id"] in applied.get(key, ()):
+                    continue
+                for doc in entry["results"]:
+                    scores.setdefault(key, Counter())[str(doc["user_id"])] += doc["score"]
+
+        # budowa w kluczach tymczasowych i podmiana przez RENAME, żeby odczyt nie trafił na pusty ranking
+        keys = [self.all_key(guild_id), *self.window_keys(guild_id, MAX_DAYS + 1, today)]
+        pipe = self.redis.pipeline()
+        for key in keys:
+            if scores.get(key):
+                pipe.delete(f"{key}:rebuild")
+                pipe.zadd(f"{key}:rebuild", dict(scores[key]))
+                pipe.rename(f"{key}:rebuild", key)
+                if key != self.all_key(guild_id):
+                    pipe.expire(key, DAY_TTL)
+            else:
+                pipe.delete(key)
+        pipe.delete(*(self.view_key(guild_id, days) for days in (7, MAX_DAYS)))
+        pipe.set(self.loaded_key(guild_id), 1, ex=DAY_TTL)
+        if await self.redis.safe_execute(pipe, self.loaded_key(guild_id)) is None:
+            return False
+        self.included[guild_id] = included
+        return True
+
+    def window_key(self, guild_id, days):
+        if days is None:
+            return self.all_key(guild_id)
+        if days == 1:
+            return self.window_keys(guild_id, 1)[0]
+        return self.view_key(guild_id, days)
+
+    async def top(self, guild_id, days=None, limit=10, user_id=None):
+        # zwraca (najlepsi gracze, (miejsce, wynik) pytającego albo None) lub None, gdy Redis nie odpowiada
+        key = self.window_key(guild_id, days)
+        pipe = self.redis.pipeline()
+        pipe.exists(self.loaded_key(guild_id))
+        pipe.exists(key)
+        state = await self.redis.safe_execute(pipe, key)
+        if state is None:
+            return None
+        loaded, cached = state
+        if not loaded:
+            if not await self.ensure_loaded(guild_id):
+                return None
+            cached = False
+
+        pipe = self.redis.pipeline()
+        if key == self.view_key(guild_id, days) and not cached:
+            pipe.zunionstore(key, self.window_keys(guild_id, days))
+            pipe.expire(key, VIEW_TTL)
+        pipe.zrevrange(key, 0, limit - 1, withscores=True)
+        if user_id is not None:
+            pipe.zrevrank(key, user_id)
+            pipe.zscore(key, user_id)
+        result = await self.redis.safe_execute(pipe, key)
+        if result is None:
+            return None
+
+        result = result[-3:] if user_id is not None else result[-1:]
+        entries = [(int(member), int(score)) for member, score in result[0]]
+        own = None
+        if user_id is not None and result[1] is not None:
+            own = (result[1] + 1, int(result[2]))
+        return entries, own
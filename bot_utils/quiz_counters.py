@@ -0,0 +1,68 @@
+PUBLIC_KEY = "public"
+
+# zakresy list quizów: niezalogowani widzą publiczne, zalogowani publiczne i własne prywatne,
+# "moje quizy" to wszystkie aktywne quizy użytkownika
+PUBLIC = "public"
+VISIBLE = "visible"
+MINE = "mine"
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def quiz_delta(before, after):
+    # before/after: is_private quizu przed i po zmianie, None gdy quiz nie był/nie jest aktywny
+    public = (after is False) - (before is False)
+    total = (after is not None) - (before is not None)
+    private = (after is True) - (before is True)
+    return public, total, private
+
+
+async def record_change(counters, user_id, before, after):
+    # liczniki bez upsert: nieistniejący licznik zostanie policzony od zera przy pierwszym odczycie
+    public, total, private = quiz_delta(before, after)
+    if public:
+        await counters.update_one({"_id": PUBLIC_KEY}, {"$inc": {"total": public}})
+    if total or private:
+        await counters.update_one({"_id": user_key(user_id)}, {"$inc": {"total": total, "private": private}})
+
+
+async def seed_counter(counters, quizzes, key, user_id=None):
+    if key == PUBLIC_KEY:
+        counts = {"total": await quizzes.count_documents({"is_private": False, "is_active": True})}
+    else:
+        counts = {
+            "total": await quizzes.count_documents({"user_id": user_id, "is_active": True}),
+            "private": await quizzes.count_documents({"user_id": user_id, "is_private": True, "is_active": True}),
+        }
+    # $setOnInsert: jeśli inny proces zdążył utworzyć licznik, zostawiamy jego wartość
+    await counters.update_one({"_id": key}, {"$setOnInsert": counts}, upsert=True)
+    return counts
+
+
+async def cached_total(counters, quizzes, scope, user_id=None):
+    keys = []
+    if scope in (PUBLIC, VISIBLE):
+        keys.append(PUBLIC_KEY)
+    if scope in (VISIBLE, MINE):
+        keys.append(user_key(user_id))
+
+    found = {doc["_id"]: doc for doc in await counters.find({"_id": {"$in": keys}}).to_list(len(keys))}
+    for key in keys:
+        if key not in found:
+            found[key] = await seed_counter(counters, quizzes, key, user_id)
+
+    if scope == PUBLIC:
+        return found[PUBLIC_KEY]["total"]
+    if scope == MINE:
+        return found[user_key(user_id)]["total"]
+    return found[PUBLIC_KEY]["total"] + found[user_key(user_id)].get("private", 0)
+
+
+async def private_count(counters, quizzes, user_id):
+    key = user_key(user_id)
+    doc = await counters.find_one({"_id": key})
+    if doc is None:
+        doc = await seed_counter(counters, quizzes, key, user_id)
+    return doc.get("private", 0)
@@ -0,0 +1,182 @@
+import base64
+from datetime import datetime
+
+import bson.json_util
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+
+from bot_utils.search_index import search_stages
+
+# nazwy sortowań z komendy /searchquiz i z panelu WWW -> (pole, kierunek)
+SORTS = {
+    "relevance": ("search_score", -1),
+    "title_asc": ("title_lower", 1),
+    "title_desc": ("title_lower", -1),
+    "question_asc": ("question_count", 1),
+    "question_desc": ("question_count", -1),
+    "questions_asc": ("question_count", 1),
+    "questions_desc": ("question_count", -1),
+    "author_asc": ("author_lower", 1),
+    "author_desc": ("author_lower", -1),
+    "created_asc": ("created_at", 1),
+    "created_desc": ("created_at", -1),
+    "create_date_asc": ("created_at", 1),
+    "create_date_desc": ("created_at", -1),
+    "updated_asc": ("updated_at", 1),
+    "updated_desc": ("updated_at", -1),
+    "updated_date_asc": ("updated_at", 1),
+    "updated_date_desc": ("updated_at", -1),
+}
+SORT_FIELDS = ("title_lower", "question_count", "author_lower", "created_at", "updated_at")
+# typ wartości pola sortowania w kursorze; None oznacza dokument bez tego pola
+FIELD_TYPES = {
+    "search_score": (int, float),
+    "title_lower": str,
+    "question_count": int,
+    "author_lower": str,
+    "created_at": datetime,
+    "updated_at": datetime,
+}
+
+PROJECTION = {
+    "title": 1,
+    "author_name": 1,
+    "question_count": 1,
+    "play_count": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "access_code": 1,
+    "user_id": 1,
+    "is_private": 1,
+    "search_score": 1,
+    "author_lower": 1,
+    "title_lower": 1,
+}
+
+
+def listing_fields(title, questions, author_name=None):
+    # pola listy quizów trzymane w dokumencie, żeby sortowanie mogło korzystać z indeksów
+    fields = {
+        "title_lower": title.lower(),
+        "question_count": len(questions),
+    }
+    if author_name is not None:
+        fields.update(author_fields(author_name))
+    return fields
+
+
+def author_fields(author_name):
+    return {"author_name": author_name, "author_lower": author_name.lower()}
+
+
+def listing_indexes():
+    # dla każdego sortowania po jednym indeksie na gałąź filtra widoczności:
+    # quizy publiczne (is_private) i quizy użytkownika (user_id)
+    indexes = []
+    for field in SORT_FIELDS:
+        for prefix in ("is_private", "user_id"):
+            indexes.append(IndexModel([(prefix, ASCENDING), (field, ASCENDING), ("_id", ASCENDING)],
+                                      name=f"listing_{prefix}_{field}",
+                                      partialFilterExpression={"is_active": True}))
+    return indexes
+
+
+def encode_cursor(data):
+    raw = bson.json_util.dumps(data).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, sort, field, page_size):
+    # kursor przychodzi od klienta, więc przepuszczamy tylko wartości, które sami mogliśmy wystawić
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = bson.json_util.loads(raw)
+    except Exception:
+        # json_util przy zniekształconych $date/$oid potrafi rzucić dowolnym wyjątkiem
+        return None
+    if not isinstance(data, dict) or data.get("s") != sort or data.get("d") not in ("next", "prev"):
+        return None
+    if "id" in data:
+        value = data.get("v")
+        if not isinstance(data["id"], ObjectId) or isinstance(value, bool):
+            return None
+        if value is not None and not isinstance(value, FIELD_TYPES[field]):
+            return None
+    n = data.get("n", page_size)
+    if isinstance(n, bool) or not isinstance(n, int) or not 1 <= n <= page_size:
+        return None
+    return data
+
+
+def resolve_sort(sort, search, default):
+    field, direction = SORTS.get(sort, default)
+    if field == "search_score" and not search:
+        field, direction = default
+    return field, direction
+
+
+def keyset_match(field, direction, value, last_id):
+    # brak pola i null są w sortowaniu mniejsze od każdej wartości, a porównania $gt/$lt ich nie obejmują
+    op = "$gt" if direction == 1 else "$lt"
+    tie = {field: value, "_id": {op: last_id}}
+    if value is None:
+        after = [{field: {"$ne": None}}] if direction == 1 else []
+    elif direction == 1:
+        after = [{field: {op: value}}]
+    else:
+        after = [{field: {op: value}}, {field: None}]
+    return {"$match": {"$or": after + [tie]}}
+
+
+async def fetch_page(collection, filters, search, sort, page_size, cursor=None, default=("created_at", -1),
+                     total=None):
+    # stronicowanie po (pole sortowania, _id): kolejna strona zaczyna się za ostatnim dokumentem
+    # poprzedniej, więc strona N kosztuje tyle samo co pierwsza
+    field, direction = resolve_sort(sort, search, default)
+    state = decode_cursor(cursor, sort, field, page_size)
+    backwards = state is not None and state["d"] == "prev"
+    scan_direction = -direction if backwards else direction
+    limit = state.get("n", page_size) if state else page_size
+
+    search_match, stages = search_stages(search)
+    page = []
+    if state is not None and "id" in state:
+        page.append(keyset_match(field, scan_direction, state["v"], state["id"]))
+    page += [
+        {"$sort": {field: scan_direction, "_id": scan_direction}},
+        {"$limit": limit + 1},
+        {"$project": PROJECTION},
+    ]
+
+    pipeline = [{"$match": {**filters, **search_match}}, *stages]
+    if total is None:
+        # bez znanej liczby wyników (wyszukiwanie) strona i licznik przychodzą w jednym zapytaniu
+        pipeline.append({"$facet": {"page": page, "total": [{"$count": "total"}]}})
+        result = await collection.aggregate(pipeline).to_list(1)
+        docs = result[0]["page"] if result else []
+        total = result[0]["total"][0]["total"] if result and result[0]["total"] else 0
+    else:
+        docs = await collection.aggregate(pipeline + page).to_list(limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    if backwards:
+        docs.reverse()
+
+    def token(doc, direction_name):
+        return encode_cursor({"s": sort, "d": direction_name, "v": doc.get(field), "id": doc["_id"]})
+
+    next_token = None
+    prev_token = None
+    if docs:
+        if (has_more and not backwards) or (backwards and "id" in state):
+            next_token = token(docs[-1], "next")
+        if (has_more and backwards) or (state is not None and not backwards):
+            prev_token = token(docs[0], "prev")
+
+    last_token = None
+    if total:
+        last_size = total - (total - 1) // page_size * page_size
+        last_token = encode_cursor({"s": sort, "d": "prev", "n": last_size})
+    return docs, next_token, prev_token, last_token, total
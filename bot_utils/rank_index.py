@@ -0,0 +1,136 @@
+import random
+
+MAX_LEVELS = 24
+
+
+class _Node:
+    __slots__ = ("key", "user_id", "next", "width")
+
+    def __init__(self, key, user_id, levels):
+        self.key = key
+        self.user_id = user_id
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class RankIndex:
+    def __init__(self):
+        self.head = _Node(None, None, MAX_LEVELS)
+        self.levels = 1
+        self.size = 0
+        self.total = 0
+        self.keys = {}
+        self.seq = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, user_id):
+        return user_id in self.keys
+
+    @staticmethod
+    def __random_level():
+        level = 1
+        while level < MAX_LEVELS and random.random() < 0.5:
+            level += 1
+        return level
+
+    def __insert(self, key, user_id):
+        update = [None] * MAX_LEVELS
+        steps_at = [0] * MAX_LEVELS
+        node = self.head
+        pos = 0
+        for i in reversed(range(self.levels)):
+            while node.next[i] is not None and node.next[i].key < key:
+                pos += node.width[i]
+                node = node.next[i]
+            update[i] = node
+            steps_at[i] = pos
+
+        level = self.__random_level()
+        if level > self.levels:
+            for i in range(self.levels, level):
+                update[i] = self.head
+                steps_at[i] = 0
+                self.head.width[i] = self.size + 1
+            self.levels = level
+
+        new = _Node(key, user_id, level)
+        for i in range(level):
+            prev = update[i]
+            new.next[i] = prev.next[i]
+            prev.next[i] = new
+            new.width[i] = prev.width[i] - (pos - steps_at[i])
+            prev.width[i] = pos - steps_at[i] + 1
+        for i in range(level, self.levels):
+            update[i].width[i] += 1
+        self.size += 1
+
+    def __remove(self, key):
+        update = [None] * self.levels
+        node = self.head
+        for i in reversed(range(self.levels)):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+
+        target = node.next[0]
+        for i in range(self.levels):
+            prev = update[i]
+            if prev.next[i] is target:
+                prev.width[i] += target.width[i] - 1
+                prev.next[i] = target.next[i]
+            else:
+                prev.width[i] -= 1
+        self.size -= 1
+
+    def update(self, user_id, score):
+        key = self.keys.get(user_id)
+        if key is not None:
+            if -key[0] == score:
+                return
+            self.__remove(key)
+            self.total += key[0]
+            seq = key[1]
+        else:
+            seq = self.seq
+            self.seq += 1
+
+        key = (-score, seq)
+        self.keys[user_id] = key
+        self.total += score
+        self.__insert(key, user_id)
+
+    def remove(self, user_id):
+        key = self.keys.pop(user_id, None)
+        if key is None:
+            return
+        self.__remove(key)
+        self.total += key[0]
+
+    def rank(self, user_id):
+        key = self.keys.get(user_id)
+        if key is None:
+            return None
+        node = self.head
+        pos = 0
+        for i in reversed(range(self.levels)):
+            while node.next[i] is not None and node.next[i].key <= key:
+                pos += node.width[i]
+                node = node.next[i]
+        return pos
+
+    def score(self, user_id):
+        key = self.keys.get(user_id)
+        return -key[0] if key is not None else None
+
+    def top(self, n):
+        result = []
+        node = self.head.next[0]
+        while node is not None and len(result) < n:
+            result.append((node.user_id, -node.key[0]))
+            node = node.next[0]
+        return result
+
+    def average(self):
+        return self.total / self.size if self.size else 0
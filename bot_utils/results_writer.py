@@ -0,0 +1,126 @@
+import asyncio
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from logging import ERROR, INFO
+
+import bson.json_util
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from bot_utils.leaderboard_buckets import bucket_updates
+
+DUPLICATE_KEY = 11000
+
+
+class ResultsWriter:
+    def __init__(self, db, redis, logger, buffer_key, batch_size=100, flush_interval=2.0, max_retry_delay=60.0):
+        self.db = db
+        self.redis = redis
+        self.logger = logger
+        self.buffer_key = buffer_key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retry_delay = max_retry_delay
+
+        self.queue = []
+        self.delay = flush_interval
+        self.flush_now = None
+        self.worker = None
+        self.lock = None
+
+    def __log(self, message, level):
+        self.logger.name = "ResultsWriter"
+        self.logger.log(msg=message, level=level)
+
+    async def start(self):
+        self.flush_now = asyncio.Event()
+        self.lock = asyncio.Lock()
+
+        pipe = self.redis.pipeline()
+        pipe.lrange(self.buffer_key, 0, -1)
+        result = await self.redis.safe_execute(pipe, self.buffer_key)
+        if result and result[0]:
+            for raw in result[0]:
+                self.queue.append((raw, json.loads(raw, object_hook=bson.json_util.object_hook)))
+            self.__log(f"Przywrócono {len(result[0])} niezapisanych gier z bufora", INFO)
+            self.flush_now.set()
+
+        self.worker = asyncio.create_task(self.__run())
+
+    async def enqueue(self, game_doc, result_docs):
+        entry = {"game": game_doc, "results": result_docs}
+        raw = json.dumps(entry, default=bson.json_util.default)
+
+        pipe = self.redis.pipeline()
+        pipe.rpush(self.buffer_key, raw)
+        await self.redis.safe_execute(pipe, self.buffer_key)
+
+        self.queue.append((raw, entry))
+        if len(self.queue) >= self.batch_size and self.flush_now:
+            self.flush_now.set()
+
+    def pending(self, guild_id):
+        return [entry for _, entry in self.queue if entry["game"]["guild_id"] == guild_id]
+
+    async def __run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_now.wait(), timeout=self.delay)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self.lock:
+            while self.queue:
+                batch = self.queue[:self.batch_size]
+                try:
+                    await self.write(batch)
+                except Exception as e:
+                    self.delay = min(self.delay * 2, self.max_retry_delay)
+                    self.__log(f"Nie udało się zapisać {len(batch)} gier, ponowienie za {self.delay}s: {e}", ERROR)
+                    return
+
+                del self.queue[:len(batch)]
+                self.delay = self.flush_interval
+
+                pipe = self.redis.pipeline()
+                for raw, _ in batch:
+                    pipe.lrem(self.buffer_key, 1, raw)
+                await self.redis.safe_execute(pipe, self.buffer_key)
+
+    async def write(self, batch):
+        game_ops = [InsertOne(entry["game"]) for _, entry in batch]
+        result_ops = [InsertOne(doc) for _, entry in batch for doc in entry["results"]]
+
+        duplicates = await self.__bulk_write(self.db["Games"], game_ops)
+        if result_ops:
+            await self.__bulk_write(self.db["Results"], result_ops)
+
+        bucket_ops = [op for _, entry in batch for op in bucket_updates(entry["game"], entry["results"])]
+        if bucket_ops:
+            await self.__bulk_write(self.db["LeaderboardBuckets"], bucket_ops)
+
+        # licznik rozegranych gier podbijamy tylko za gry zapisane teraz, a nie przy ponowieniu
+        now = datetime.now(timezone.utc)
+        plays = Counter(entry["game"]["quiz_code"] for index, (_, entry) in enumerate(batch) if index not in duplicates)
+        if plays:
+            await self.db["Quizzes"].bulk_write(
+                [UpdateOne({"access_code": code, "is_active": True}, {"$inc": {"play_count": count}, "$set": {"changed_at": now}})
+                 for code, count in plays.items()],
+                ordered=False)
+
+    @staticmethod
+    async def __bulk_write(collection, ops):
+        try:
+            await collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # ponowienie po częściowym zapisie trafia na te same _id, duplikaty traktujemy jako zapisane
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+            if errors or e.details.get("writeConcernErrors"):
+                raise
+            return {err["index"] for err in e.details.get("writeErrors", [])}
+        return set()
@@ -0,0 +1,33 @@
+import math
+
+# szkic rozkładu sum punktów graczy w kubełkach logarytmicznych (jak w DDSketch): granice kubełków
+# rosną o GAMMA, więc próg "top X%" jest wyznaczony z błędem względnym najwyżej ACCURACY,
+# a gracz, któremu suma urosła, przechodzi z kubełka do kubełka (usunięcie + dodanie)
+ACCURACY = 0.02
+GAMMA = (1 + ACCURACY) / (1 - ACCURACY)
+
+
+def bucket(value):
+    # kubełek 0 to wyniki niedodatnie, kubełek k >= 1 obejmuje (GAMMA^(k-2), GAMMA^(k-1)]
+    if value <= 0:
+        return 0
+    return math.ceil(math.log(value, GAMMA) - 1e-9) + 1
+
+
+def moves(old_total, new_total, is_new):
+    # zmiany liczników kubełków po grze: {kubełek: przyrost}
+    changes = {bucket(new_total): 1}
+    if not is_new:
+        old = bucket(old_total)
+        changes[old] = changes.get(old, 0) - 1
+    return {key: delta for key, delta in changes.items() if delta}
+
+
+def share_below(counts, value):
+    # część graczy z mniejszą sumą; gracze z tego samego kubełka liczą się w połowie
+    total = sum(counts.values())
+    if total <= 0:
+        return None
+    own = bucket(value)
+    below = sum(count for key, count in counts.items() if key < own)
+    return min(max((below + counts.get(own, 0) / 2) / total, 0.0), 1.0)
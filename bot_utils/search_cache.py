@@ -0,0 +1,34 @@
+import hashlib
+import json
+
+from bot_utils.search_index import normalize
+
+VERSION_KEY = "search_cache:version"
+
+
+class SearchCache:
+    # strony wyników wyszukiwania współdzielone między użytkownikami; zapis lub usunięcie quizu
+    # podbija wersję, więc stare wpisy przestają być czytane i wygasają po ttl
+    def __init__(self, redis, ttl=60):
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def key(version, scope, search, sort, page_size, cursor):
+        query = " ".join(normalize(search))
+        digest = hashlib.sha1(json.dumps([query, sort, page_size, cursor or ""]).encode()).hexdigest()
+        return f"search_cache:{version}:{scope}:{digest}"
+
+    async def version(self):
+        return await self.redis.safe_get_raw(VERSION_KEY) or "0"
+
+    async def get(self, key):
+        return await self.redis.safe_get(key)
+
+    async def set(self, key, page):
+        await self.redis.safe_set(key, page, ex=self.ttl)
+
+    async def invalidate(self):
+        pipe = self.redis.pipeline()
+        pipe.incr(VERSION_KEY)
+        await self.redis.safe_execute(pipe, VERSION_KEY)
@@ -0,0 +1,78 @@
+import math
+import re
+import unicodedata
+
+from pymongo import ASCENDING, IndexModel
+
+MIN_MATCH = 0.6
+MAX_QUERY_GRAMS = 32
+MAX_QUESTION_GRAMS = 600
+
+# litery, które NFKD nie rozkłada na literę bazową i znak diakrytyczny
+FOLD = str.maketrans({"ł": "l", "đ": "d", "ø": "o", "ß": "ss", "æ": "ae", "œ": "oe"})
+NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", (text or "").lower()).translate(FOLD)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_WORD.sub(" ", text).replace("_", " ").split()
+
+
+def word_grams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def text_grams(text, limit=None):
+    grams = set()
+    for word in normalize(text):
+        grams |= word_grams(word)
+        if limit is not None and len(grams) >= limit:
+            break
+    return grams
+
+
+def search_fields(title, questions):
+    # pola utrzymywane w dokumencie quizu: trigramy tytułu i treści pytań z indeksem wielokluczowym
+    title_grams = text_grams(title)
+    question_grams = set()
+    for question in questions:
+        text = question.get("question") if isinstance(question, dict) else question.question
+        question_grams |= text_grams(text, MAX_QUESTION_GRAMS - len(question_grams))
+        if len(question_grams) >= MAX_QUESTION_GRAMS:
+            break
+    return {
+        "title_grams": sorted(title_grams),
+        "search_grams": sorted(title_grams | question_grams),
+    }
+
+
+def query_grams(search):
+    grams = set()
+    for word in normalize(search):
+        grams |= word_grams(word)
+    return sorted(grams)[:MAX_QUERY_GRAMS]
+
+
+def search_stages(search):
+    # zwraca filtr dla $match (korzysta z indeksu search_grams) i etapy liczące trafność;
+    # literówka psuje najwyżej trzy trigramy słowa, dlatego wystarcza 60% zgodnych trigramów
+    grams = query_grams(search)
+    if not grams:
+        return {}, []
+
+    threshold = max(1, math.ceil(len(grams) * MIN_MATCH))
+    stages = [
+        {"$addFields": {
+            "search_hits": {"$size": {"$setIntersection": ["$search_grams", grams]}},
+            "title_hits": {"$size": {"$setIntersection": [{"$ifNull": ["$title_grams", []]}, grams]}},
+        }},
+        {"$match": {"search_hits": {"$gte": threshold}}},
+        {"$addFields": {"search_score": {"$add": ["$search_hits", {"$multiply": ["$title_hits", 2]}]}}},
+    ]
+    return {"search_grams": {"$in": grams}}, stages
+
+
+SEARCH_INDEX = IndexModel([("search_grams", ASCENDING)], name="search_grams",
+                          partialFilterExpression={"is_active": True})
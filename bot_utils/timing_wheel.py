@@ -0,0 +1,116 @@
+import asyncio
+import math
+from logging import ERROR
+
+
+class TimerHandle:
+    __slots__ = ("tick", "callback", "args", "cancelled", "wheel")
+
+    def __init__(self, tick, callback, args, wheel):
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.wheel = wheel
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel.pending -= 1
+
+
+class TimingWheel:
+    def __init__(self, logger=None, tick=0.05, slots=64, levels=3):
+        self.logger = logger
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.spans = [slots ** level for level in range(levels + 1)]
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.overflow = []
+
+        self.current = 0
+        self.pending = 0
+        self.drift = 0.0
+        self.worker = None
+        self.wakeup = None
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(asyncio.get_running_loop().time() + delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        loop = asyncio.get_running_loop()
+        if self.worker is None or self.worker.done():
+            self.wakeup = asyncio.Event()
+            self.worker = loop.create_task(self.__run())
+        if self.pending == 0:
+            self.current = math.floor(loop.time() / self.tick)
+
+        tick = max(math.ceil(when / self.tick), self.current + 1)
+        handle = TimerHandle(tick, callback, args, self)
+        self.pending += 1
+        self.__place(handle)
+        self.wakeup.set()
+        return handle
+
+    def __place(self, handle):
+        delta = handle.tick - self.current
+        for level in range(self.levels):
+            if delta < self.spans[level + 1]:
+                slot = (handle.tick // self.spans[level]) % self.slots
+                self.wheels[level][slot].append(handle)
+                return
+        self.overflow.append(handle)
+
+    def __advance(self, tick):
+        if tick % self.spans[self.levels] == 0 and self.overflow:
+            overflow, self.overflow = self.overflow, []
+            for handle in overflow:
+                if not handle.cancelled:
+                    self.__place(handle)
+
+        for level in range(self.levels - 1, 0, -1):
+            if tick % self.spans[level] == 0:
+                slot = (tick // self.spans[level]) % self.slots
+                bucket, self.wheels[level][slot] = self.wheels[level][slot], []
+                for handle in bucket:
+                    if not handle.cancelled:
+                        self.__place(handle)
+
+        slot = tick % self.slots
+        bucket, self.wheels[0][slot] = self.wheels[0][slot], []
+        for handle in bucket:
+            if handle.cancelled:
+                continue
+            if handle.tick > tick:
+                self.__place(handle)
+                continue
+            handle.cancelled = True
+            self.pending -= 1
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                if self.logger:
+                    self.logger.name = "TimingWheel"
+                    self.logger.log(msg=f"Błąd w zaplanowanym zadaniu: {e}", level=ERROR)
+
+    async def __run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.pending == 0:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            target = (self.current + 1) * self.tick
+            delay = target - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            now = loop.time()
+            self.drift = now - target
+            # (current + 1) * tick / tick potrafi dać w floatach current, co kręciłoby pętlę bez await
+            now_tick = max(math.floor(now / self.tick), self.current + 1)
+            while self.current < now_tick and self.pending > 0:
+                self.current += 1
+                self.__advance(self.current)
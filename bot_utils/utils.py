@@ -6,6 +6,9 @@ import logging
 from pymongo import DESCENDING, ASCENDING
 
 from model.quiz_model import QuizModel
+from bot_utils.search_index import query_grams
+from bot_utils.quiz_counters import cached_total, private_count, user_key, VISIBLE
+from bot_utils.quiz_listing import fetch_page
 
 async def get_quiz(db,access_code):
     doc = await db["Quizzes"].find_one({"access_code": access_code,"is_active": True})
@@ -70,107 +73,46 @@ def calc_shards(inst_index, total_inst, total_shards):
              f"Error: Instancja {inst_index} nie ma przypisanych shardów.")
     return shard_ids
 
-async def count_quizzes(db, user_id: int, search: str) -> int:
-    filters = {
+def visible_filters(user_id: int):
+    return {
         "$or": [
             {"is_private": False},
             {"is_private": True, "user_id": user_id}
         ],
-        "title": {"$regex": search, "$options": "i"},
         "is_active": True
     }
-    total = await db["Quizzes"].count_documents(filters)
-    return total
 
 
 async def fetch_quizzes_page(
     db,
     user_id: int,
     search: str,
-    page: int,
     page_size: int,
     sort,
+    cursor=None,
+    total=None,
+    cache=None,
 ) :
-    match sort:
-        case "title_asc":
-            sort_order = [("title_lower", 1)]
-        case "title_desc":
-            sort_order = [("title_lower", -1)]
-        case "question_asc":
-            sort_order = [("questions", 1)]
-        case "question_desc":
-            sort_order = [("questions", -1)]
-        case "author_asc":
-            sort_order = [("author_lower", 1)]
-        case "author_desc":
-            sort_order = [("author_lower", -1)]
-        case "created_asc":
-            sort_order = [("created_at", 1)]
-        case "created_desc":
-            sort_order = [("created_at", -1)]
-        case "updated_asc":
-            sort_order = [("updated_at", 1)]
-        case "updated_desc":
-            sort_order = [("updated_at", -1)]
-        case _:
-            sort_order = [("created_at", -1)]
-
-    filters = {
-        "$or": [
-            {"is_private": False},
-            {"is_private": True, "user_id": user_id}
-        ],
-        "title": {"$regex": search, "$options": "i"},
-        "is_active": True
-    }
-
-    pipeline = [
-        {"$match": filters},
-        {
-            "$lookup": {
-                "from": "Users",
-                "localField": "user_id",
-                "foreignField": "user_id",
-                "as": "author_info"
-            }
-        },
-        {
-            "$addFields": {
-                "author": {
-                    "$ifNull": [
-                        {"$arrayElemAt": ["$author_info.username", 0]},
-                        "Unknown Author"
-                    ]
-                },
-                "questions": {"$size": "$questions"}
-            }
-        },
-        {
-            "$project": {
-                "title": 1,
-                "author": 1,
-                "questions": 1,
-                "created_at": 1,
-                "updated_at": 1,
-                "access_code":1,
-                "author_lower": {"$toLower": "$author"},
-                "title_lower": {"$toLower": "$title"}
-            }
-        },
-        {
-            "$sort": dict(sort_order)
-        },
-        {"$skip": page * page_size},
-        {"$limit": page_size}
-    ]
-
-    docs = await db["Quizzes"].aggregate(pipeline).to_list()
+    key = None
+    if cache is not None:
+        # użytkownik bez prywatnych quizów widzi to samo co wszyscy, więc korzysta ze wspólnych wpisów
+        private = await private_count(db["QuizCounters"], db["Quizzes"], user_id)
+        scope = user_key(user_id) if private else "public"
+        key = cache.key(await cache.version(), scope, search, sort, page_size, cursor)
+        page = await cache.get(key)
+        if page is not None:
+            return page["results"], page["next_cursor"], page["prev_cursor"], page["total"]
+
+    if total is None and not query_grams(search):
+        total = await cached_total(db["QuizCounters"], db["Quizzes"], VISIBLE, user_id)
+    docs, next_cursor, prev_cursor, _, total = await fetch_page(
+        db["Quizzes"], visible_filters(user_id), search, sort, page_size, cursor, total=total)
 
     results = []
     for doc in docs:
         title = doc.get("title", "")
-        questions_count = doc.get("questions", 0)
-        user_id_ = doc.get("author")
+        questions_count = doc.get("question_count", 0)
+        user_id_ = doc.get("author_name", "Unknown Author")
         acode = doc.get("access_code")
         updated_at = doc.get("updated_at").isoformat(" ", "seconds")
 
@@ -182,5 +124,7 @@ async def fetch_quizzes_page(
             "updated_at": updated_at
         })
 
-    return results
-
+    if key is not None:
+        await cache.set(key, {"results": results, "next_cursor": next_cursor,
+                              "prev_cursor": prev_cursor, "total": total})
+    return results, next_cursor, prev_cursor, total
@@ -1,5 +1,5 @@
 import logging
-from datetime import timedelta, datetime, timezone
+import math
 from logging import ERROR
 
 import discord
@@ -11,7 +11,13 @@ from bot_modules.search_view import SearchView
 from model.settings_model import SettingsModel
 
 from enum import Enum
-from bot_utils.utils import fetch_quizzes_page, count_quizzes
+from bot_utils.utils import fetch_quizzes_page
+from bot_utils.RedisHelper import RedisHelper
+from bot_utils.search_cache import SearchCache
+from bot_utils.autocomplete_index import choice_label, MAX_CHOICE_LENGTH
+from bot_utils.leaderboard_buckets import top_scores
+from bot_utils.live_leaderboard import LiveLeaderboard
+from bot_utils.global_stats import TOP_SIZE
 
 
 class TimeRange(Enum):
@@ -20,12 +26,18 @@ class TimeRange(Enum):
     month = "month"
 
 
+TIME_RANGE_DAYS = {TimeRange.day: 1, TimeRange.week: 7, TimeRange.month: 30}
+
+
 
 
 class MiscCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = self.bot.db
+        self.redis = RedisHelper(self.bot.redis, self.bot.logger)
+        self.search_cache = SearchCache(self.redis)
+        self.live_leaderboard = LiveLeaderboard(self.redis, self.db["LeaderboardBuckets"])
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
@@ -63,34 +75,19 @@ class MiscCog(commands.Cog):
             limit: Optional[int] = 10
     ):
         guild_id = interaction.guild.id
-
-        query = {"guild_id": guild_id}
-
-        now = datetime.now(timezone.utc)
-        if time_range == TimeRange.day:
-            cutoff = now - timedelta(days=1)
-            query["finished_at"] = {"$gte": cutoff}
-        elif time_range == TimeRange.week:
-            cutoff = now - timedelta(weeks=1)
-            query["finished_at"] = {"$gte": cutoff}
-        elif time_range == TimeRange.month:
-            cutoff = now - timedelta(days=30)
-            query["finished_at"] = {"$gte": cutoff}
-
-        pipeline = [
-            {"$match": query},
-            {"$group": {
-                "_id": "$user_id",
-                "total_score": {"$sum": "$score"}
-            }},
-            {"$sort": {"total_score": -1}},
-            {"$limit": limit}
-        ]
+        days = TIME_RANGE_DAYS.get(time_range)
 
         try:
             await interaction.response.defer()
-            results_coll = self.db["Results"]
-            docs = await results_coll.aggregate(pipeline).to_list(None)
+            # instancja z QuizCog zna gry czekające na zapis i dzieli z nim blokadę przebudowy
+            quiz_cog = self.bot.get_cog("QuizCog")
+            live_leaderboard = quiz_cog.live_leaderboard if quiz_cog else self.live_leaderboard
+            live = await live_leaderboard.top(guild_id, days, limit, interaction.user.id)
+            if live is not None:
+                docs, own = live
+            else:
+                docs = await top_scores(self.db["LeaderboardBuckets"], guild_id, days, limit)
+                own = None
         except Exception as e:
             self.bot.log(message=e, name="MongoDB error", level=ERROR)
             await interaction.followup.send("Wystąpił problem z pobraniem wyników spróbuj ponownie później", ephemeral=True)
@@ -108,22 +105,24 @@ class MiscCog(commands.Cog):
 
         description = ""
         rank = 1
-        for doc in docs:
-            user_id = doc["_id"]
-            total_score = doc["total_score"]
+        for user_id, total_score in docs:
             member = interaction.guild.get_member(user_id)
             user_mention = member.mention if member else f"<@{user_id}>"
             description += f"**{rank}.** {user_mention} — {total_score} pkt\n"
             rank += 1
 
+        if own is not None and own[0] > len(docs):
+            description += f"\nTwoja pozycja: **{own[0]}.** — {own[1]} pkt"
+
         embed.description = description
         await interaction.followup.send(embed=embed, ephemeral=False)
 
     @app_commands.command(name="searchquiz", description="Wyszukaj quizy po słowie kluczowym.")
     @app_commands.describe(keyword="Fraza do wyszukania",
                            page_size="Liczba quizów na stronę (domyślnie 5)",
-                           sort="Sortowanie wyników (domyślnie od najnowszych)")
+                           sort="Sortowanie wyników (domyślnie od najtrafniejszych)")
     @app_commands.choices(sort=[
+        app_commands.Choice(name="Trafność", value="relevance"),
         app_commands.Choice(name="Tytuł rosnąco", value="title_asc"),
         app_commands.Choice(name="Tytuł malejąco", value="title_desc"),
         app_commands.Choice(name="Liczba pytań rosnąco", value="question_asc"),
@@ -137,24 +136,22 @@ class MiscCog(commands.Cog):
     ])
     @app_commands.guild_only()
     async def search_quiz(self, interaction: discord.Interaction, keyword: str, page_size: Optional[int] = 5,
-                          sort:Optional[str] = "created_desc"):
+                          sort:Optional[str] = "relevance"):
         try:
             await interaction.response.send_message("Szukam quizów.", ephemeral=True)
-            total = await count_quizzes(self.bot.db, interaction.user.id, keyword)
-            if total == 0:
-                await interaction.edit_original_response(content="Brak wyników dla tej frazy.")
-                return
-
             page = 0
             print(sort)
-            results = await fetch_quizzes_page(
+            results, next_cursor, prev_cursor, total = await fetch_quizzes_page(
                 db=self.bot.db,
                 user_id=interaction.user.id,
                 search=keyword,
-                page=page,
                 page_size=page_size,
                 sort=sort,
+                cache=self.search_cache,
             )
+            if total == 0:
+                await interaction.edit_original_response(content="Brak wyników dla tej frazy.")
+                return
         except Exception as e:
             self.bot.log(message=e, name="MongoDB error", level=ERROR)
             await interaction.edit_original_response(content="Wystąpił problem z wyszukaniem quizów spróbuj ponownie później")
@@ -168,11 +165,89 @@ class MiscCog(commands.Cog):
             page=page,
             page_size=page_size,
             sort=sort,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+            cache=self.search_cache,
         )
+        view.prefetch(next_cursor)
 
         embed = view.build_embed(results, page)
         await interaction.edit_original_response(embed=embed, view=view)
 
+    @search_quiz.autocomplete("keyword")
+    async def keyword_autocomplete(self, interaction: discord.Interaction, current: str):
+        quiz_cog = self.bot.get_cog("QuizCog")
+        if quiz_cog is None:
+            return []
+        entries = quiz_cog.quiz_index.search(current, interaction.user.id, interaction.guild_id)
+        return [app_commands.Choice(name=choice_label(entry), value=entry.title[:MAX_CHOICE_LENGTH])
+                for entry in entries]
+
+    @app_commands.command(name="globalleaderboard", description="Wyświetla najlepszych graczy ze wszystkich serwerów.")
+    @app_commands.describe(limit=f"Ilu użytkowników wyświetlić (domyślnie 10, maksymalnie {TOP_SIZE})")
+    async def global_leaderboard(self, interaction: discord.Interaction, limit: Optional[int] = 10):
+        quiz_cog = self.bot.get_cog("QuizCog")
+        if quiz_cog is None:
+            await interaction.response.send_message("Ranking jest chwilowo niedostępny.", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+        docs = await quiz_cog.global_stats.top(max(1, min(limit, TOP_SIZE)))
+        if docs is None:
+            await interaction.followup.send("Wystąpił problem z pobraniem wyników spróbuj ponownie później", ephemeral=True)
+            return
+        if not docs:
+            await interaction.followup.send("Brak wyników.", ephemeral=True)
+            return
+
+        description = ""
+        for rank, (user_id, total_score) in enumerate(docs, 1):
+            user = self.bot.get_user(user_id)
+            user_name = user.name if user else f"<@{user_id}>"
+            description += f"**{rank}.** {user_name} — {total_score} pkt\n"
+
+        embed = discord.Embed(
+            title="Globalny ranking graczy",
+            description=description,
+            color=discord.Color.gold()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=False)
+
+    @app_commands.command(name="globalrank", description="Pokazuje Twoją pozycję wśród graczy ze wszystkich serwerów.")
+    async def global_rank(self, interaction: discord.Interaction):
+        quiz_cog = self.bot.get_cog("QuizCog")
+        if quiz_cog is None:
+            await interaction.response.send_message("Ranking jest chwilowo niedostępny.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            stats = await quiz_cog.global_stats.player(interaction.user.id)
+        except Exception as e:
+            self.bot.log(message=e, name="Redis error", level=ERROR)
+            await interaction.followup.send("Wystąpił problem z pobraniem wyników spróbuj ponownie później", ephemeral=True)
+            return
+
+        if stats is None:
+            await interaction.followup.send("Nie masz jeszcze żadnych wyników.", ephemeral=True)
+            return
+
+        total, games, rank, share = stats
+        description = f"Suma punktów: **{total}**\nRozegrane gry: **{games}**\n"
+        if games:
+            description += f"Średnio na grę: **{total / games:.0f}** pkt\n"
+        if rank is not None:
+            description += f"Miejsce w globalnym rankingu: **{rank}.**\n"
+        if share is not None:
+            description += f"Jesteś w **top {max(1, math.ceil((1 - share) * 100))}%** graczy."
+
+        embed = discord.Embed(
+            title=f"Statystyki gracza {interaction.user.name}",
+            description=description,
+            color=discord.Color.gold()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
 
 async def setup(bot):
     await bot.add_cog(MiscCog(bot))
\ No newline at end of file
@@ -1,3 +1,4 @@
+import os
 import re
 
 import discord
@@ -12,8 +13,20 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 import motor.motor_asyncio
 from bot_utils.RedisHelper import RedisHelper
+from bot_utils.layout_cache import QuizLayoutCache
+from bot_utils.image_cache import ImageCache
+from bot_utils.attachment_registry import AttachmentRegistry
+from bot_modules.session_store import SessionStore
+from bot_utils.edit_scheduler import ChannelBuckets
+from bot_utils.timing_wheel import TimingWheel
+from bot_utils.results_writer import ResultsWriter
+from bot_utils.autocomplete_index import AutocompleteIndex, choice_label
+from bot_utils.live_leaderboard import LiveLeaderboard
+from bot_utils.global_stats import GlobalStats
+from config.indexes import ensure_indexes
 from bot import BotClass
-from logging import ERROR
+from logging import ERROR, INFO
+import time
 
 class MembersListTransformer(app_commands.Transformer):
     async def transform(self, interaction: discord.Interaction, value: str) -> List[discord.Member]:
@@ -47,40 +60,81 @@ class QuizCog(commands.Cog):
         self.db = self.bot.db
         self.fs = motor.motor_asyncio.AsyncIOMotorGridFSBucket(self.db)
         self.redis = RedisHelper(self.bot.redis, self.bot.logger)
+        self.layout_cache = QuizLayoutCache()
+        self.image_cache = ImageCache(self.fs)
+        image_channel = os.environ.get("IMAGE_CHANNEL_ID")
+        self.attachment_registry = AttachmentRegistry(self.redis, self.bot,
+                                                      int(image_channel) if image_channel else None)
+        self.session_store = SessionStore(self.redis, self.bot.total_shards)
+        self.restore_concurrency = 16
+        self.edit_buckets = ChannelBuckets()
+        self.scheduler = TimingWheel(self.bot.logger)
+        self.tasks = set()
+        self.results_writer = ResultsWriter(self.db, self.redis, self.bot.logger,
+                                            f"results_buffer:{min(self.bot.shard_ids)}")
+        self.quiz_index = AutocompleteIndex(self.db["Quizzes"], self.bot.logger)
+        self.live_leaderboard = LiveLeaderboard(self.redis, self.db["LeaderboardBuckets"], self.results_writer.pending)
+        self.global_stats = GlobalStats(self.redis)
         self.bot.loop.create_task(self.on_ready())
 
 
+    def spawn(self, coro_fn, *args):
+        task = asyncio.create_task(self.__guard(coro_fn, *args))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def __guard(self, coro_fn, *args):
+        try:
+            await coro_fn(*args)
+        except Exception as e:
+            self.bot.log(message=f"Błąd w {coro_fn.__name__}: {e}", name="Scheduler error", level=ERROR)
+
     async def on_ready(self):
         await self.bot.wait_until_ready()
+        await self.results_writer.start()
+        self.spawn(self.quiz_index.start)
+        self.spawn(ensure_indexes, self.db, self.log_index_error)
         await self.restore_sessions()
 
-    async def restore_sessions(self):
-        pattern = "quiz_session:*"
-        keys = await self.redis.safe_keys(pattern)
-        if keys is None:
-            return
-        for key in keys:
-            parts = key.split(":")
-            if len(parts) != 3:
-                continue
-
-            guild_id = int(parts[1])
-            channel_id = int(parts[2])
+    def log_index_error(self, message):
+        self.bot.log(message=message, name="Indexes", level=ERROR)
 
-            inst_shards = list(self.bot.shards.keys())
-            total_shards = self.bot.total_shards
-            guild_shard = (guild_id >> 22) % total_shards
-            if guild_shard not in inst_shards:
-                continue
+    async def cog_unload(self):
+        self.quiz_index.stop()
+        if self.results_writer.worker:
+            self.results_writer.worker.cancel()
+            await self.results_writer.flush()
 
-            data = await self.redis.safe_get(key)
-            if data is None:
+    async def restore_sessions(self):
+        semaphore = asyncio.Semaphore(self.restore_concurrency)
+        for shard_id in self.bot.shards.keys():
+            start = time.perf_counter()
+            keys = await self.session_store.shard_sessions(shard_id)
+            if not keys:
                 continue
-            session = await QuizSession.from_state(data,self,self.bot)
 
-            game_key = (guild_id, channel_id)
-            self.active_games[game_key] = session
-            await session.send_question()
+            states = await self.session_store.load_many(keys)
+            stale = [key for key, data in zip(keys, states) if data is None]
+            if stale:
+                await self.session_store.forget(shard_id, stale)
+
+            results = await asyncio.gather(*(self.restore_session(data, semaphore) for data in states if data))
+            self.bot.log(message=f"Shard {shard_id}: przywrócono {sum(results)}/{len(keys)} gier "
+                                 f"w {time.perf_counter() - start:.2f}s",
+                         name="Restore", level=INFO)
+
+    async def restore_session(self, data, semaphore):
+        async with semaphore:
+            try:
+                session = await QuizSession.from_state(data, self, self.bot)
+                self.active_games[(data["guild_id"], data["channel_id"])] = session
+                await session.send_question()
+                return True
+            except Exception as e:
+                self.bot.log(message=f"Nie udało się przywrócić gry {data['guild_id']}:{data['channel_id']}: {e}",
+                             name="Restore", level=ERROR)
+                return False
 
     async def ensure_guild_settings(self, guild_id: int) -> dict:
         doc = await self.db['Settings'].find_one({"guild_id": guild_id})
@@ -112,7 +166,7 @@ class QuizCog(commands.Cog):
                     color=discord.Color.red()
                 )
                 await message.channel.send(embed=embed, view=view)
-                join_view.stop()
+                join_view.close()
                 join_view.message = None
 
     @commands.Cog.listener()
@@ -190,6 +244,11 @@ class QuizCog(commands.Cog):
             await ctx.followup.send("Ten quiz nie istnieje")
             return
 
+        self.quiz_index.touch(guild_id, quiz.access_code)
+        for question in quiz.questions[:2]:
+            if question.image_url:
+                self.image_cache.prefetch(question.image_url)
+
         join_view = JoinQuizView(timeout=settings["join_window_display_time"], cog=self, game_key=game_key, gamestarter=ctx.user, allowed_users=allowed_users)
         self.active_join_views[game_key] = join_view
         end_time = datetime.now(timezone.utc) + timedelta(seconds=join_view.timeout)
@@ -202,29 +261,38 @@ class QuizCog(commands.Cog):
         embed.add_field(name="Uczestnicy:", value="Brak", inline=False)
         await ctx.followup.send(embed=embed, view=join_view)
         message = await ctx.original_response()
-        join_view.message = message
-        await asyncio.sleep(join_view.timeout)
+        join_view.attach(message, embed)
+        join_view.launch_timer = self.scheduler.call_later(join_view.timeout, self.spawn, self.launch_game,
+                                                           game_key, join_view, quiz, ctx.channel, ctx.user, settings)
 
-        if game_key not in self.active_join_views:
-            return
+    @start_quiz.autocomplete("access_code")
+    async def access_code_autocomplete(self, interaction: discord.Interaction, current: str):
+        entries = self.quiz_index.search(current, interaction.user.id, interaction.guild_id)
+        return [app_commands.Choice(name=choice_label(entry), value=entry.code) for entry in entries]
 
+    async def launch_game(self, game_key, join_view, quiz, channel, game_starter, settings):
+        if self.active_join_views.get(game_key) is not join_view:
+            return
 
-        if game_key in self.active_join_views:
-            del self.active_join_views[game_key]
+        del self.active_join_views[game_key]
+        join_view.close()
+        message = join_view.message
 
         if not join_view.players:
             embed = discord.Embed(
                 title="Nikt nie dołączył do quizu",
                 color=discord.Color.red()
             )
-            await message.edit(embed=embed, view=None)
+            await join_view.editor.edit(embed=embed, view=None)
             return
 
-        game = QuizSession(quiz, ctx.channel, self, players=join_view.players, message=message,
-                           game_starter=ctx.user,
+        game = QuizSession(quiz, channel, self, players=list(join_view.players), message=message,
+                           game_starter=game_starter,
                            correct_answer_display_time=settings["answer_display_time"],
                            scoreboard_display_time=settings["results_display_time"],
                            send_private_messages=settings["show_results_per_question"])
+        # ta sama kolejka edycji, żeby spóźniona lista graczy nie nadpisała pierwszego pytania
+        game.editor = join_view.editor
         self.active_games[game_key] = game
         await game.start()
 
@@ -254,6 +322,7 @@ class QuizCog(commands.Cog):
                 return
 
             del self.active_join_views[game_key]
+            join_view.close()
 
             if join_view.message:
                 embed = discord.Embed(
@@ -261,8 +330,7 @@ class QuizCog(commands.Cog):
                     description="Gra została anulowana",
                     color=discord.Color.red()
                 )
-                await join_view.message.edit(embed=embed, view=None)
-            join_view.stop()
+                await join_view.editor.edit(embed=embed, view=None)
 
             await ctx.response.send_message("Proces dołączania do gry został anulowany.", ephemeral=True)
 
@@ -294,9 +362,6 @@ class QuizCog(commands.Cog):
 
         await ctx.response.send_message("Aktualne pytanie zostało pominięte.", ephemeral=True)
 
-        if hasattr(game, 'question_task') and not game.question_task.done():
-            game.question_task.cancel()
-
         await game.question_summary()
 
     @app_commands.command(name="kickplayer", description="Wyrzuć gracza z aktualnego quizu.")
@@ -318,16 +383,10 @@ class QuizCog(commands.Cog):
             await interaction.response.send_message("Nie masz uprawnień do wyrzucania graczy z quizu.", ephemeral=True)
             return
 
-        if member not in game.players:
+        if not game.kick_player(member.id):
             await interaction.response.send_message(f"{member.mention} i tak nie jest w tym quizie.", ephemeral=True)
             return
 
-        game.kicked_players.add(member.id)
-        if member in game.scores:
-            del game.scores[member]
-        if member in game.streaks:
-            del game.streaks[member]
-
         await interaction.response.send_message(f"{member.mention} został wyrzucony z quizu.", ephemeral=True)
 
 
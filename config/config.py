@@ -1,5 +1,6 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from redis import asyncio as aioredis
 from dotenv import load_dotenv
 import asyncio
 
@@ -16,6 +17,9 @@ user_collection = db['Users']
 settings_collection = db['Settings']
 game_collection = db['Games']
 result_collection = db['Results']
+counter_collection = db['QuizCounters']
+
+redis_client = aioredis.from_url(os.environ.get('REDIS_CONNECTION', 'redis://localhost:6379'), decode_responses=True)
 
 try:
     client.admin.command('ping')
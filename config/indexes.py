@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from bot_utils.autocomplete_index import CHANGED_INDEX
+from bot_utils.leaderboard_buckets import BUCKET_INDEX
+from bot_utils.quiz_listing import listing_indexes, SORT_FIELDS
+from bot_utils.search_index import SEARCH_INDEX
+
+# sesje panelu, których token wygasł ponad 30 dni temu, usuwa sam MongoDB
+SESSION_TTL = 30 * 24 * 3600
+
+INDEXES = {
+    "Quizzes": [
+        IndexModel([("access_code", ASCENDING)], name="access_code", unique=True),
+        IndexModel([("user_id", ASCENDING), ("is_private", ASCENDING)], name="user_quizzes",
+                   partialFilterExpression={"is_active": True}),
+        SEARCH_INDEX,
+        CHANGED_INDEX,
+        *listing_indexes(),
+    ],
+    "Settings": [
+        IndexModel([("guild_id", ASCENDING)], name="guild_id", unique=True),
+    ],
+    "Results": [
+        # odbudowa kubełków rankingu jednego serwera (tools.backfill_leaderboard --guild)
+        IndexModel([("guild_id", ASCENDING), ("finished_at", DESCENDING), ("user_id", ASCENDING), ("score", ASCENDING)],
+                   name="guild_leaderboard"),
+    ],
+    "LeaderboardBuckets": [
+        BUCKET_INDEX,
+    ],
+    "Games": [
+        IndexModel([("quiz_code", ASCENDING)], name="quiz_code"),
+    ],
+    "Sessions": [
+        IndexModel([("user_id", ASCENDING)], name="user_id", unique=True),
+        IndexModel([("token_expires_at", ASCENDING)], name="session_ttl", expireAfterSeconds=SESSION_TTL),
+    ],
+    "Users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id", unique=True),
+    ],
+}
+
+
+def query_shapes():
+    # (kolekcja, opis, filtr albo potok agregacji, sortowanie) dla zapytań wykonywanych przez bota i panel
+    since = datetime.now(timezone.utc) - timedelta(days=1)
+    shapes = [
+        ("Quizzes", "get_quiz", {"access_code": "AbCd1234", "is_active": True}, None),
+        ("Quizzes", "get_unique_access_code", {"access_code": "AbCd1234"}, None),
+        ("Quizzes", "wyszukiwanie", {"search_grams": {"$in": [" ab", "abc"]}, "is_active": True}, None),
+        ("Quizzes", "podpowiedzi", {"changed_at": {"$gte": since}}, None),
+        ("Quizzes", "licznik quizów użytkownika", {"user_id": 0, "is_private": True, "is_active": True}, None),
+        ("Settings", "ustawienia serwera", {"guild_id": 0}, None),
+        ("LeaderboardBuckets", "/leaderboard", {"guild_id": 0, "day": {"$gte": since}}, None),
+        ("Games", "liczba gier quizu", {"quiz_code": "AbCd1234"}, None),
+        ("Sessions", "sesja użytkownika", {"user_id": 0}, None),
+        ("Users", "autor quizu", {"user_id": 0}, None),
+    ]
+    scopes = {
+        "publiczne": {"is_private": False, "is_active": True},
+        "moje": {"user_id": 0, "is_active": True},
+        "widoczne": {"$or": [{"is_private": False}, {"is_private": True, "user_id": 0}], "is_active": True},
+    }
+    for field in SORT_FIELDS:
+        for scope, filters in scopes.items():
+            shapes.append(("Quizzes", f"lista {scope} po {field}", filters, [(field, ASCENDING), ("_id", ASCENDING)]))
+    return shapes
+
+
+async def ensure_indexes(db, log=print):
+    # każdy indeks osobno, żeby konflikt jednego (np. zmienione opcje) nie blokował pozostałych
+    created = 0
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+                created += 1
+            except OperationFailure as e:
+                log(f"Nie udało się utworzyć indeksu {collection}.{index.document['name']}: {e}")
+    return created
@@ -8,7 +8,10 @@ from model.session_model import SessionModel
 from model.user_model import UserModel
 from utils.auth import api
 from utils.discord_api import discord_api
-from config.config import session_collection, user_collection
+from utils.search_cache import search_cache
+from pymongo import ReturnDocument
+from bot_utils.quiz_listing import author_fields
+from config.config import session_collection, user_collection, quiz_collection
 
 load_dotenv()
 main_router = APIRouter()
@@ -71,11 +74,18 @@ async def login(code: str = None):
         user_id=user_id,
         username=user.get('username'),
     )
-    await user_collection.update_one(
+    old_user = await user_collection.find_one_and_update(
         {"user_id": int(user_id)},
         {"$set": user_name_model.model_dump()},
-        upsert=True
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
     )
+    if old_user is None or old_user.get("username") != user_name_model.username:
+        await quiz_collection.update_many(
+            {"user_id": int(user_id)},
+            {"$set": author_fields(user_name_model.username)}
+        )
+        await search_cache.invalidate()
 
     if result.upserted_id:
         doc_id = result.upserted_id
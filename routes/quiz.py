@@ -11,13 +11,18 @@ from utils.auth import api
 from utils.validate_session import validate_session_without_data, validate_session_with_data
 from utils.validate_quiz import validate_quiz_data, img_scaling
 from utils.generate_unique_id import get_unique_access_code
-from config.config import session_collection, quiz_collection, db, user_collection, game_collection
+from bot_utils.search_index import search_fields, query_grams
+from bot_utils.quiz_listing import fetch_page, listing_fields
+from config.indexes import ensure_indexes
+from bot_utils.quiz_counters import cached_total, record_change, PUBLIC, VISIBLE, MINE
+from utils.search_cache import search_cache
+from config.config import session_collection, quiz_collection, db, user_collection, game_collection, counter_collection
 import json
 from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorGridFSBucket
 from math import ceil
 from fastapi.responses import JSONResponse
-from pymongo import ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
 from fastapi.responses import StreamingResponse
 import pytz
 
@@ -26,6 +31,10 @@ quiz_router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
 
+@quiz_router.on_event("startup")
+async def on_startup():
+    await ensure_indexes(db)
+
 @quiz_router.get("/new-quiz")
 async def make_quiz(request: Request, _: None = Depends(validate_session_without_data)):
     return templates.TemplateResponse(
@@ -97,15 +106,22 @@ async def save_quiz(
             saved_questions.append(saved_question)
 
     if quiz_id:
-        await quiz_collection.update_one(
-            {"_id": quiz_id},
+        before = await quiz_collection.find_one_and_update(
+            {"_id": quiz_id, "is_active": True},
             {"$set": {
                 'title': title,
                 'updated_at': datetime.now(timezone.utc),
+                'changed_at': datetime.now(timezone.utc),
                 'questions': saved_questions,
-                'is_private': is_private
+                'is_private': is_private,
+                **search_fields(title, saved_questions),
+                **listing_fields(title, saved_questions, user.get("username"))
             }},
+            projection={"is_private": 1},
+            return_document=ReturnDocument.BEFORE
         )
+        if before:
+            await record_change(counter_collection, int(user_id), before.get("is_private", False), is_private)
     else:
         access_code = await get_unique_access_code()
         quiz = QuizModel(
@@ -119,8 +135,14 @@ async def save_quiz(
         )
 
         quiz_dict = quiz.model_dump()
+        quiz_dict.update(search_fields(title, saved_questions))
+        quiz_dict.update(listing_fields(title, saved_questions, user.get("username")))
+        quiz_dict["play_count"] = 0
+        quiz_dict["changed_at"] = quiz_dict["updated_at"]
         quiz_id = await quiz_collection.insert_one(quiz_dict)
+        await record_change(counter_collection, int(user_id), None, is_private)
 
+    await search_cache.invalidate()
     return JSONResponse(content={}, status_code=200)
 
 @quiz_router.get("/quiz")
@@ -164,6 +186,7 @@ async def get_all_quizzes(request: Request):
 async def get_quizzes_data(
     request: Request,
     page: int = 1,
+    cursor: str = "",
     sort: str = "title_asc",
     search: str = "",
     is_only_my_quiz: bool = False,
@@ -176,9 +199,12 @@ async def get_quizzes_data(
 
     if is_only_my_quiz:
         filters = {"user_id": user_id}
+        scope = MINE
     elif not is_user_logged:
         filters = {"is_private": False}
+        scope = PUBLIC
     else:
+        scope = VISIBLE
         filters = {
             "$or": [
                 {"is_private": False},
@@ -187,78 +213,18 @@ async def get_quizzes_data(
         }
 
     filters["is_active"] = True
-    if search:
-        filters["title"] = {"$regex": search, "$options": "i"}
-
-    sort_order = []
-    if sort == "title_asc":
-        sort_order = [("title_lower", ASCENDING)]
-    elif sort == "title_desc":
-        sort_order = [("title_lower", DESCENDING)]
-    elif sort == "questions_asc":
-        sort_order = [("questions", ASCENDING)]
-    elif sort == "questions_desc":
-        sort_order = [("questions", DESCENDING)]
-    elif sort == "author_asc":
-        sort_order = [("author_lower", ASCENDING)]
-    elif sort == "author_desc":
-        sort_order = [("author_lower", DESCENDING)]
-    elif sort == "create_date_asc":
-        sort_order = [("created_at", ASCENDING)]
-    elif sort == "create_date_desc":
-        sort_order = [("created_at", DESCENDING)]
-    elif sort == "updated_date_asc":
-        sort_order = [("updated_at", ASCENDING)]
-    elif sort == "updated_date_desc":
-        sort_order = [("updated_at", DESCENDING)]
-    else:
-        sort_order = [("updated_at", ASCENDING)]
-
-    pipeline = [
-        {"$match": filters},
-        {
-            "$lookup": {
-                "from": "Users",
-                "localField": "user_id",
-                "foreignField": "user_id",
-                "as": "author_info"
-            }
-        },
-        {
-            "$addFields": {
-                "author": {
-                    "$ifNull": [
-                        {"$arrayElemAt": ["$author_info.username", 0]},
-                        "Unknown Author"
-                    ]
-                },
-                "questions": {"$size": "$questions"}
-            }
-        },
-        {
-            "$project": {
-                "title": 1,
-                "author": 1,
-                "questions": 1,
-                "created_at": 1,
-                "updated_at": 1,
-                "user_id": 1,
-                "is_private": 1,
-                "author_lower": {"$toLower": "$author"},
-                "title_lower": {"$toLower": "$title"}
-            }
-        },
-        {
-            "$sort": dict(sort_order)
-        },
-        {"$skip": (page - 1) * 9},
-        {"$limit": 9}
-    ]
-
-    quizzes_cursor = quiz_collection.aggregate(pipeline)
+    total_quizzes = None
+    if not query_grams(search):
+        total_quizzes = await cached_total(counter_collection, quiz_collection, scope,
+                                           user_id if is_user_logged else None)
+
+    docs, next_cursor, prev_cursor, last_cursor, total_quizzes = await fetch_page(
+        quiz_collection, filters, search, sort, 9, cursor,
+        default=("updated_at", DESCENDING), total=total_quizzes)
+    total_pages = ceil(total_quizzes / 9)
 
     quizzes = []
-    async for quiz in quizzes_cursor:
+    for quiz in docs:
         is_editable = False
         if is_user_logged:
             if quiz["user_id"] == user_id:
@@ -267,20 +233,20 @@ async def get_quizzes_data(
         quizzes.append({
             "_id": str(quiz["_id"]),
             "title": quiz["title"],
-            "author": quiz["author"],
-            "questions": quiz["questions"],
+            "author": quiz.get("author_name", "Unknown Author"),
+            "questions": quiz.get("question_count", 0),
             "created_at": quiz["created_at"].isoformat(),
             "updated_at": quiz["updated_at"].isoformat(),
             "is_editable": is_editable
         })
 
-    total_quizzes = await quiz_collection.count_documents(filters)
-    total_pages = ceil(total_quizzes / 9)
-
     return JSONResponse({
         "quizzes": quizzes,
         "page": page,
-        "total_pages": total_pages
+        "total_pages": total_pages,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "last_cursor": last_cursor
     })
 
 @quiz_router.delete("/quiz/delete/{quiz_id}")
@@ -295,7 +261,10 @@ async def delete_quiz(quiz_id: str, data: dict = Depends(validate_session_with_d
     if quiz["user_id"] != int(user_id):
         raise HTTPException(status_code=401, detail="Brak uprawnień")
 
-    await quiz_collection.update_one({"_id": quiz_object_id}, {"$set": {"is_active": False}})
+    result = await quiz_collection.update_one({"_id": quiz_object_id, "is_active": True}, {"$set": {"is_active": False, "changed_at": datetime.now(timezone.utc)}})
+    if result.modified_count:
+        await record_change(counter_collection, int(user_id), quiz.get("is_private", False), None)
+        await search_cache.invalidate()
 
     return Response(status_code=204)
 
@@ -365,7 +334,9 @@ async def view_quiz(request: Request, quiz_id: str):
         for question in quiz["questions"]:
             question["image_url"] = f"/quiz/image/{str(question.get('image_url'))}" if question.get('image_url') else None
 
-        game_count = await game_collection.count_documents({"quiz_code": quiz["access_code"]})
+        game_count = quiz.get("play_count")
+        if game_count is None:
+            game_count = await game_collection.count_documents({"quiz_code": quiz["access_code"]})
         user = await user_collection.find_one({"user_id": quiz["user_id"]}, {"username": 1})
 
         if user_id:
@@ -1,13 +1,13 @@
 let currentPage = 1;
 
-function loadPage(page) {
+function loadPage(page, cursor = '') {
     currentPage = page;
     const sortOption = document.getElementById('sort-select').value;
     const searchQuery = document.getElementById('search-input').value;
     const isOnlyMyQuiz = document.getElementById('isOnlyMyQuizHidden').value;
     const isUserLogged = document.getElementById('isUserLogged').value;
 
-    fetch(`/quiz/data?page=${page}&sort=${sortOption}&search=${encodeURIComponent(searchQuery)}&is_only_my_quiz=${isOnlyMyQuiz}&is_user_logged=${isUserLogged}`)
+    fetch(`/quiz/data?page=${page}&cursor=${encodeURIComponent(cursor || '')}&sort=${sortOption}&search=${encodeURIComponent(searchQuery)}&is_only_my_quiz=${isOnlyMyQuiz}&is_user_logged=${isUserLogged}`)
         .then(response => response.json())
         .then(data => {
             const quizList = document.getElementById('quiz-list');
@@ -69,17 +69,17 @@ function loadPage(page) {
                         <li class="page-item ${page == 1 ? 'disabled' : ''}">
                             <a class="page-link color-l2" href="#" onclick="loadPage(1)">&laquo;&laquo;</a>
                         </li>
-                        <li class="page-item ${page == 1 ? 'disabled' : ''}">
-                            <a class="page-link color-l2" href="#" onclick="loadPage(${page - 1})">&laquo;</a>
+                        <li class="page-item ${page == 1 || !data.prev_cursor ? 'disabled' : ''}">
+                            <a class="page-link color-l2" href="#" onclick="loadPage(${page - 1}, '${data.prev_cursor || ''}')">&laquo;</a>
                         </li>
                         <li class="page-item">
                             <span class="page-link color-d2">Strona ${page} z ${data.total_pages}</span>
                         </li>
-                        <li class="page-item ${page == data.total_pages ? 'disabled' : ''}">
-                            <a class="page-link color-l2" href="#" onclick="loadPage(${page + 1})">&raquo;</a>
+                        <li class="page-item ${page == data.total_pages || !data.next_cursor ? 'disabled' : ''}">
+                            <a class="page-link color-l2" href="#" onclick="loadPage(${page + 1}, '${data.next_cursor || ''}')">&raquo;</a>
                         </li>
                         <li class="page-item ${page == data.total_pages ? 'disabled' : ''}">
-                            <a class="page-link color-l2" href="#" onclick="loadPage(${data.total_pages})">&raquo;&raquo;</a>
+                            <a class="page-link color-l2" href="#" onclick="loadPage(${data.total_pages}, '${data.last_cursor || ''}')">&raquo;&raquo;</a>
                         </li>
                     </ul>
                 </nav>
@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import heapq
+from collections import Counter
+
+from bot_utils.global_stats import TOTALS_KEY, GAMES_KEY, TOP_KEY, SKETCH_KEY, TOP_SIZE
+from bot_utils.score_sketch import bucket
+from config.config import redis_client, result_collection
+
+
+async def backfill(batch_size):
+    # jednorazowo przenosi historię z kolekcji Results; uruchamiać przy zatrzymanych botach
+    totals = {}
+    games = {}
+    async for row in result_collection.aggregate(
+            [{"$group": {"_id": "$user_id", "total": {"$sum": "$score"}, "games": {"$sum": 1}}}], allowDiskUse=True):
+        totals[row["_id"]] = row["total"]
+        games[row["_id"]] = row["games"]
+
+    users = list(totals)
+    await redis_client.delete(TOTALS_KEY, GAMES_KEY)
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(TOTALS_KEY, mapping={user_id: totals[user_id] for user_id in batch})
+        pipe.hset(GAMES_KEY, mapping={user_id: games[user_id] for user_id in batch})
+        await pipe.execute()
+
+    top = heapq.nlargest(TOP_SIZE, totals.items(), key=lambda item: item[1])
+    sketch = Counter(bucket(total) for total in totals.values())
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(TOP_KEY, SKETCH_KEY)
+    if top:
+        pipe.zadd(TOP_KEY, dict(top))
+    if sketch:
+        pipe.hset(SKETCH_KEY, mapping=dict(sketch))
+    await pipe.execute()
+    print(f"Gotowe: {len(users)} graczy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buduje globalny ranking i rozkład sum punktów graczy z zapisanych wyników gier")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReplaceOne
+
+from bot_utils.leaderboard_buckets import bucket_day, bucket_id, day_name, RETRY_DAYS
+from config.config import db, result_collection
+from config.indexes import ensure_indexes
+
+
+async def backfill(guild_id, batch_size):
+    # przelicza kubełki od zera z kolekcji Results; uruchamiać przy zatrzymanych botach,
+    # żeby gry kończone w trakcie nie zostały nadpisane
+    await ensure_indexes(db)
+    match = {} if guild_id is None else {"guild_id": guild_id}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "guild_id": "$guild_id",
+                "day": {"$dateTrunc": {"date": "$finished_at", "unit": "day"}},
+                "user_id": "$user_id",
+            },
+            "score": {"$sum": "$score"},
+            "games": {"$addToSet": "$game_id"},
+        }},
+    ]
+
+    # kubełek całościowy pamięta gry tylko z ostatnich RETRY_DAYS dni, tak jak bucket_updates
+    recent = bucket_day(datetime.now(timezone.utc)) - timedelta(days=RETRY_DAYS)
+    scores = defaultdict(Counter)
+    games = defaultdict(set)
+    applied = defaultdict(lambda: defaultdict(set))
+    buckets = {}
+    async for row in result_collection.aggregate(pipeline, allowDiskUse=True):
+        guild, day, user_id = row["_id"]["guild_id"], row["_id"]["day"], str(row["_id"]["user_id"])
+        buckets[bucket_id(guild, day)] = (guild, day)
+        buckets[bucket_id(guild)] = (guild, None)
+        for key in (bucket_id(guild, day), bucket_id(guild)):
+            scores[key][user_id] += row["score"]
+        games[bucket_id(guild, day)].update(row["games"])
+        if day >= recent:
+            applied[bucket_id(guild)][day_name(day)].update(row["games"])
+
+    ops = []
+    written = 0
+    for key, bucket_scores in scores.items():
+        guild, day = buckets[key]
+        doc = {"guild_id": guild, "day": day, "scores": dict(bucket_scores)}
+        if day is not None:
+            doc["games"] = sorted(games[key])
+        else:
+            doc["applied"] = {name: sorted(ids) for name, ids in applied[key].items()}
+        ops.append(ReplaceOne({"_id": key}, doc, upsert=True))
+        if len(ops) >= batch_size:
+            await db["LeaderboardBuckets"].bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+            print(f"Zapisano {written} kubełków")
+    if ops:
+        await db["LeaderboardBuckets"].bulk_write(ops, ordered=False)
+        written += len(ops)
+    print(f"Gotowe, zapisano {written} kubełków")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buduje kubełki rankingu /leaderboard z zapisanych wyników gier")
+    parser.add_argument("--guild", type=int, default=None, help="przelicz tylko jeden serwer")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.guild, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from bot_utils.quiz_listing import listing_fields
+from config.config import db, quiz_collection, user_collection, game_collection
+from config.indexes import ensure_indexes
+
+
+async def backfill(batch_size, rebuild):
+    await ensure_indexes(db)
+
+    authors = {}
+    async for user in user_collection.find({}, {"user_id": 1, "username": 1}):
+        authors[user["user_id"]] = user.get("username")
+
+    plays = {}
+    async for row in game_collection.aggregate([{"$group": {"_id": "$quiz_code", "count": {"$sum": 1}}}]):
+        plays[row["_id"]] = row["count"]
+
+    query = {} if rebuild else {"question_count": {"$exists": False}}
+    cursor = quiz_collection.find(query, {"title": 1, "user_id": 1, "access_code": 1, "questions.question": 1})
+
+    ops = []
+    updated = 0
+    async for quiz in cursor:
+        fields = listing_fields(quiz.get("title", ""), quiz.get("questions", []),
+                                authors.get(quiz.get("user_id"), "Unknown Author"))
+        fields["play_count"] = plays.get(quiz.get("access_code"), 0)
+        ops.append(UpdateOne({"_id": quiz["_id"]}, {"$set": fields}))
+        if len(ops) >= batch_size:
+            await quiz_collection.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+            print(f"Zaktualizowano {updated} quizów")
+    if ops:
+        await quiz_collection.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    print(f"Gotowe, zaktualizowano {updated} quizów")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uzupełnia pola listy quizów (autor, liczba pytań, liczba gier)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rebuild", action="store_true", help="przelicz również quizy, które mają już te pola")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.rebuild))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from bot_utils.search_index import search_fields
+from config.config import db, quiz_collection
+from config.indexes import ensure_indexes
+
+
+async def backfill(batch_size, rebuild):
+    await ensure_indexes(db)
+    query = {} if rebuild else {"search_grams": {"$exists": False}}
+    cursor = quiz_collection.find(query, {"title": 1, "questions.question": 1})
+
+    ops = []
+    updated = 0
+    async for quiz in cursor:
+        ops.append(UpdateOne({"_id": quiz["_id"]},
+                             {"$set": search_fields(quiz.get("title", ""), quiz.get("questions", []))}))
+        if len(ops) >= batch_size:
+            await quiz_collection.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+            print(f"Zaktualizowano {updated} quizów")
+    if ops:
+        await quiz_collection.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    print(f"Gotowe, zaktualizowano {updated} quizów")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uzupełnia indeks wyszukiwania (trigramy) w istniejących quizach")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rebuild", action="store_true", help="przelicz również quizy, które mają już indeks")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.rebuild))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import sys
+
+from config.config import db
+from config.indexes import ensure_indexes, query_shapes
+
+
+def plan_stages(plan, stages):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append((plan["stage"], plan.get("indexName")))
+        for value in plan.values():
+            plan_stages(value, stages)
+    elif isinstance(plan, list):
+        for value in plan:
+            plan_stages(value, stages)
+    return stages
+
+
+def winning_plans(explain, plans):
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                plans.append(value)
+            else:
+                winning_plans(value, plans)
+    elif isinstance(explain, list):
+        for value in explain:
+            winning_plans(value, plans)
+    return plans
+
+
+async def explain(collection, query, sort):
+    if isinstance(query, list):
+        return await db.command("aggregate", collection, pipeline=query, explain=True)
+    cursor = db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    return await cursor.limit(10).explain()
+
+
+async def check(apply):
+    if apply:
+        created = await ensure_indexes(db)
+        print(f"Zastosowano {created} indeksów")
+
+    problems = 0
+    for collection, name, query, sort in query_shapes():
+        stages = []
+        for plan in winning_plans(await explain(collection, query, sort), []):
+            plan_stages(plan, stages)
+
+        indexes = sorted({index for stage, index in stages if index})
+        flags = []
+        if any(stage == "COLLSCAN" for stage, _ in stages):
+            flags.append("COLLSCAN")
+        if sort and any(stage == "SORT" for stage, _ in stages):
+            flags.append("sortowanie w pamięci")
+        problems += bool(flags)
+
+        status = "BŁĄD" if flags else "ok"
+        details = ", ".join(flags) if flags else ", ".join(indexes)
+        print(f"[{status:>4}] {collection:<9} {name:<40} {details}")
+
+    print(f"Zapytania z problemami: {problems}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sprawdza plany zapytań (explain) i wskazuje skany całych kolekcji")
+    parser.add_argument("--apply", action="store_true", help="najpierw utwórz brakujące indeksy")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(check(args.apply)) else 0)
+
+
+if __name__ == "__main__":
+    main()
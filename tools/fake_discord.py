@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from collections import defaultdict
+
+import uvicorn
+from fastapi import APIRouter, FastAPI, Form, Header, Request
+from fastapi.responses import JSONResponse
+
+
+class FakeDiscordState:
+    def __init__(self, latency=0.05, jitter=0.02, rate_limit=0, rate_window=1.0, error_rate=0.0,
+                 guilds_per_user=20, bot_guilds=1000, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self.guilds_per_user = guilds_per_user
+        self.bot_guilds = bot_guilds
+        self.random = random.Random(seed)
+        self.buckets = defaultdict(list)
+        self.requests = 0
+        self.limited = 0
+
+    def user_id(self, authorization):
+        # token ma postać fake-<id>, więc ten sam kod logowania daje zawsze tego samego użytkownika
+        token = (authorization or "").split(" ", 1)[-1]
+        if not token.startswith("fake-"):
+            return None
+        return token[5:]
+
+    def user_guilds(self, user_id):
+        first = int(user_id) % self.bot_guilds
+        return [
+            {
+                "id": str(1000 + (first + i) % self.bot_guilds),
+                "name": f"Serwer {(first + i) % self.bot_guilds}",
+                "icon": None,
+                "owner": i == 0,
+                "permissions": "8" if i % 2 == 0 else "0",
+            }
+            for i in range(self.guilds_per_user)
+        ]
+
+    async def throttle(self, request: Request):
+        self.requests += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.too_many(self.random.uniform(0.1, 1.0))
+
+        if self.rate_limit:
+            key = (request.headers.get("Authorization"), request.url.path)
+            now = time.monotonic()
+            hits = [t for t in self.buckets[key] if now - t < self.rate_window]
+            if len(hits) >= self.rate_limit:
+                self.buckets[key] = hits
+                return self.too_many(self.rate_window - (now - hits[0]))
+            hits.append(now)
+            self.buckets[key] = hits
+        return None
+
+    def too_many(self, retry_after):
+        self.limited += 1
+        retry_after = round(max(retry_after, 0.001), 3)
+        return JSONResponse(
+            {"message": "You are being rate limited.", "retry_after": retry_after, "global": False},
+            status_code=429,
+            headers={"Retry-After": str(retry_after), "X-RateLimit-Scope": "user"},
+        )
+
+
+def create_app(state: FakeDiscordState):
+    router = APIRouter()
+
+    @router.get("/users/@me")
+    async def get_me(request: Request, authorization: str = Header(None)):
+        limited = await state.throttle(request)
+        if limited:
+            return limited
+        user_id = state.user_id(authorization)
+        if user_id is None:
+            return JSONResponse({"message": "401: Unauthorized", "code": 0}, status_code=401)
+        return {"id": user_id, "username": f"gracz{user_id}", "global_name": f"Gracz {user_id}",
+                "avatar": None, "email": f"gracz{user_id}@example.com"}
+
+    @router.get("/users/@me/guilds")
+    async def get_my_guilds(request: Request, authorization: str = Header(None)):
+        limited = await state.throttle(request)
+        if limited:
+            return limited
+        if authorization and authorization.startswith("Bot "):
+            return [{"id": str(1000 + i), "name": f"Serwer {i}"} for i in range(state.bot_guilds)]
+        user_id = state.user_id(authorization)
+        if user_id is None:
+            return JSONResponse({"message": "401: Unauthorized", "code": 0}, status_code=401)
+        return state.user_guilds(user_id)
+
+    @router.get("/guilds/{guild_id}")
+    async def get_guild(request: Request, guild_id: int):
+        limited = await state.throttle(request)
+        if limited:
+            return limited
+        if not 1000 <= guild_id < 1000 + state.bot_guilds:
+            return JSONResponse({"message": "Unknown Guild", "code": 10004}, status_code=404)
+        return {"id": str(guild_id), "name": f"Serwer {guild_id - 1000}"}
+
+    @router.post("/oauth2/token")
+    async def token(request: Request, grant_type: str = Form(...), code: str = Form(None),
+                    refresh_token: str = Form(None)):
+        limited = await state.throttle(request)
+        if limited:
+            return limited
+        source = code if grant_type == "authorization_code" else (refresh_token or "")[8:]
+        if not source:
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        user_id = source if source.isdigit() else str(zlib.crc32(source.encode()))
+        return {"access_token": f"fake-{user_id}", "refresh_token": f"refresh-{user_id}",
+                "expires_in": 604800, "token_type": "Bearer", "scope": "identify email guilds"}
+
+    @router.post("/oauth2/token/revoke")
+    async def revoke(request: Request):
+        limited = await state.throttle(request)
+        if limited:
+            return limited
+        return {}
+
+    @router.get("/_stats")
+    async def stats():
+        return {"requests": state.requests, "rate_limited": state.limited}
+
+    app = FastAPI()
+    # bot używa /api/v10, a OAuth /api bez wersji
+    app.include_router(router, prefix="/api")
+    app.include_router(router, prefix="/api/v10")
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalna atrapa REST/OAuth Discorda do testów obciążeniowych panelu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency", type=float, default=0.05, help="średnie opóźnienie odpowiedzi (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="odchylenie opóźnienia (s)")
+    parser.add_argument("--rate-limit", type=int, default=0,
+                        help="maks. zapytań na token i ścieżkę w oknie, 0 wyłącza limit")
+    parser.add_argument("--rate-window", type=float, default=1.0, help="okno limitu (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="szansa losowej odpowiedzi 429")
+    parser.add_argument("--guilds-per-user", type=int, default=20)
+    parser.add_argument("--bot-guilds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    state = FakeDiscordState(latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                             rate_window=args.rate_window, error_rate=args.error_rate,
+                             guilds_per_user=args.guilds_per_user, bot_guilds=args.bot_guilds, seed=args.seed)
+    print(f"Ustaw DISCORD_API_URL=http://{args.host}:{args.port}/api dla panelu")
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
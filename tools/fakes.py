@@ -0,0 +1,320 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from fnmatch import fnmatch
+from logging import ERROR
+
+from bot_utils.RedisHelper import RedisHelper
+from bot_utils.layout_cache import QuizLayoutCache
+from bot_utils.image_cache import ImageCache
+from bot_utils.attachment_registry import AttachmentRegistry
+from bot_utils.edit_scheduler import ChannelBuckets
+from bot_utils.timing_wheel import TimingWheel
+from bot_utils.results_writer import ResultsWriter
+from bot_utils.live_leaderboard import LiveLeaderboard
+from bot_utils.global_stats import GlobalStats
+from bot_modules.session_store import SessionStore
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def command(*args, **kwargs):
+            self.round_trips += 1
+            return self.call(name, *args, **kwargs)
+        return command
+
+    def call(self, name, *args, **kwargs):
+        self.commands += 1
+        return getattr(self, "_" + name)(*args, **kwargs)
+
+    async def sscan_iter(self, key, count=None):
+        self.round_trips += 1
+        for member in self.call("smembers", key):
+            yield member
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    def _mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def _expire(self, key, seconds):
+        return key in self.data
+
+    def _delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def _keys(self, pattern):
+        return [key for key in self.data if fnmatch(key, pattern)]
+
+    def _hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({str(k): str(v) for k, v in mapping.items()})
+        return len(mapping)
+
+    def _hdel(self, key, *fields):
+        values = self.data.get(key, {})
+        return sum(values.pop(str(field), None) is not None for field in fields)
+
+    def _hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def _sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(str(m) for m in members)
+        return len(members)
+
+    def _srem(self, key, *members):
+        self.data.get(key, set()).difference_update(str(m) for m in members)
+        return len(members)
+
+    def _smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def _rpush(self, key, *values):
+        self.data.setdefault(key, []).extend(values)
+        return len(self.data[key])
+
+    def _lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _zincrby(self, key, amount, member):
+        scores = self.data.setdefault(key, {})
+        scores[str(member)] = scores.get(str(member), 0) + amount
+        return scores[str(member)]
+
+    def _hincrby(self, key, field, amount):
+        values = self.data.setdefault(key, {})
+        values[str(field)] = str(int(values.get(str(field), 0)) + amount)
+        return int(values[str(field)])
+
+    def _zadd(self, key, mapping, gt=False):
+        scores = self.data.setdefault(key, {})
+        for member, score in mapping.items():
+            if not gt or score > scores.get(str(member), float("-inf")):
+                scores[str(member)] = score
+        return len(mapping)
+
+    def _zremrangebyrank(self, key, start, end):
+        scores = self.data.get(key, {})
+        ranked = sorted(scores, key=scores.get)
+        stop = max(len(ranked) + end + 1, 0) if end < 0 else end + 1
+        removed = ranked[start:stop]
+        for member in removed:
+            del scores[member]
+        return len(removed)
+
+    def _exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    def _rename(self, src, dst):
+        self.data[dst] = self.data.pop(src)
+        return True
+
+    def _lrem(self, key, count, value):
+        items = self.data.get(key, [])
+        if value in items:
+            items.remove(value)
+            return 1
+        return 0
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queue = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.queue.append((name, args, kwargs))
+            return self
+        return command
+
+    async def execute(self):
+        self.client.round_trips += 1
+        queue, self.queue = self.queue, []
+        return [self.client.call(name, *args, **kwargs) for name, args, kwargs in queue]
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.documents = 0
+
+    def __count(self, op):
+        self.db.ops[f"{self.name}.{op}"] += 1
+
+    async def insert_one(self, document):
+        self.__count("insert_one")
+        self.documents += 1
+
+    async def insert_many(self, documents):
+        self.__count("insert_many")
+        self.documents += len(documents)
+
+    async def bulk_write(self, requests, ordered=True):
+        self.__count("bulk_write")
+        self.documents += len(requests)
+
+    def find(self, *args, **kwargs):
+        self.__count("find")
+        return FakeCursor()
+
+    async def find_one(self, *args, **kwargs):
+        self.__count("find_one")
+        return None
+
+    async def update_one(self, *args, **kwargs):
+        self.__count("update_one")
+
+
+class FakeCursor:
+    async def to_list(self, length=None):
+        return []
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.ops = Counter()
+        self.collections = {}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"gracz{user_id}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.members = {}
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id):
+        return None
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild, discord_stats, edit_latency=0.15):
+        self.id = channel_id
+        self.guild = guild
+        self.stats = discord_stats
+        self.edit_latency = edit_latency
+
+    async def send(self, **kwargs):
+        self.stats["send"] += 1
+        await asyncio.sleep(self.edit_latency)
+        return FakeMessage(self)
+
+
+class FakeMessage:
+    ids = 0
+
+    def __init__(self, channel):
+        FakeMessage.ids += 1
+        self.id = FakeMessage.ids
+        self.channel = channel
+        self.attachments = []
+        self.embeds = []
+        self.on_edit = None
+
+    async def edit(self, **kwargs):
+        self.channel.stats["edit"] += 1
+        await asyncio.sleep(self.channel.edit_latency)
+        if kwargs.get("embed") is not None:
+            self.embeds = [kwargs["embed"]]
+        if self.on_edit is not None:
+            self.on_edit(kwargs)
+        return self
+
+
+class FakeResponse:
+    def __init__(self, stats):
+        self.stats = stats
+        self.done = False
+
+    async def send_message(self, **kwargs):
+        self.stats["interaction_response"] += 1
+        self.done = True
+
+    async def defer(self, **kwargs):
+        self.stats["interaction_response"] += 1
+        self.done = True
+
+
+class FakeInteraction:
+    def __init__(self, user, message, stats):
+        self.user = user
+        self.message = message
+        self.response = FakeResponse(stats)
+
+
+class FakeBot:
+    def __init__(self):
+        self.logger = logging.getLogger("simulate")
+        self.total_shards = 1
+
+    def log(self, message, name, level, **kwargs):
+        self.logger.name = name
+        self.logger.log(level=level, msg=message, **kwargs)
+
+
+class SimCog:
+    # te same atrybuty, których QuizSession używa z QuizCog, ale bez discord.py, Mongo i Redisa
+    def __init__(self):
+        self.bot = FakeBot()
+        self.active_games = {}
+        self.active_join_views = {}
+        self.db = FakeDatabase()
+        self.redis_client = FakeRedis()
+        self.redis = RedisHelper(self.redis_client, self.bot.logger)
+        self.layout_cache = QuizLayoutCache()
+        self.image_cache = ImageCache(None)
+        self.attachment_registry = AttachmentRegistry(self.redis)
+        self.session_store = SessionStore(self.redis, self.bot.total_shards)
+        self.edit_buckets = ChannelBuckets()
+        self.scheduler = TimingWheel(self.bot.logger)
+        self.results_writer = ResultsWriter(self.db, self.redis, self.bot.logger, "results_buffer:0")
+        self.live_leaderboard = LiveLeaderboard(self.redis, self.db["LeaderboardBuckets"], self.results_writer.pending)
+        self.global_stats = GlobalStats(self.redis)
+        self.tasks = set()
+        self.errors = defaultdict(int)
+
+    def spawn(self, coro_fn, *args):
+        task = asyncio.create_task(self.__guard(coro_fn, *args))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def __guard(self, coro_fn, *args):
+        try:
+            await coro_fn(*args)
+        except Exception as e:
+            self.errors[type(e).__name__] += 1
+            self.bot.log(message=f"Błąd w {coro_fn.__name__}: {e}", name="Scheduler error", level=ERROR)
@@ -0,0 +1,87 @@
+import argparse
+import sys
+import unicodedata
+from array import array
+
+from bot_utils.button_padding import (CHAR_MAP, DEFAULT_WIDTH, EMOJI_WIDTH, WIDE_WIDTH, WIDTH_SCALE,
+                                      WIDTHS_PATH)
+
+BMP_SIZE = 0x10000
+# symbole BMP, które Discord rysuje jako emoji (Twemoji), a nie glifem czcionki
+EMOJI_BLOCKS = [(0x2300, 0x23FF), (0x2600, 0x27BF), (0x2B00, 0x2BFF), (0x3030, 0x303D), (0x3297, 0x3299)]
+
+# litery z kreską, które nie rozkładają się w NFD
+BASE_ALIASES = {"ł": "l", "Ł": "L", "đ": "d", "Đ": "D", "ø": "o", "Ø": "O", "ħ": "h", "Ħ": "H"}
+
+
+def heuristic_width(code_point):
+    char = chr(code_point)
+    category = unicodedata.category(char)
+    if category in ("Mn", "Me", "Cf", "Cc", "Cs", "Zl", "Zp"):
+        return 0.0
+    # litery z diakrytykami mają szerokość litery bazowej (é jak e)
+    base = BASE_ALIASES.get(char) or unicodedata.normalize("NFD", char)[0]
+    if base != char and base in CHAR_MAP:
+        return CHAR_MAP[base]
+    east_asian = unicodedata.east_asian_width(char)
+    if east_asian in ("W", "F"):
+        if any(start <= code_point <= end for start, end in EMOJI_BLOCKS):
+            return EMOJI_WIDTH
+        return WIDE_WIDTH
+    return DEFAULT_WIDTH
+
+
+class FontMeasurer:
+    def __init__(self, paths, size):
+        from PIL import ImageFont
+
+        self.fonts = []
+        for path in paths:
+            font = ImageFont.truetype(path, size)
+            notdef = chr(0xFFFF)
+            self.fonts.append((font, font.getlength(notdef), font.getmask(notdef).getbbox()))
+
+    def width(self, code_point):
+        char = chr(code_point)
+        for font, notdef_length, notdef_bbox in self.fonts:
+            length = font.getlength(char)
+            if length == notdef_length and font.getmask(char).getbbox() == notdef_bbox:
+                continue
+            return length
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generuje tabelę szerokości znaków BMP dla button_padding")
+    parser.add_argument("--font", action="append", default=[],
+                        help="plik TTF/OTF czcionki interfejsu Discorda (gg sans), kolejne jako zapasowe")
+    parser.add_argument("--size", type=float, default=14, help="rozmiar czcionki etykiety przycisku (px)")
+    parser.add_argument("--output", default=WIDTHS_PATH)
+    args = parser.parse_args()
+
+    measurer = FontMeasurer(args.font, args.size) if args.font else None
+    widths = array("H", bytes(2 * BMP_SIZE))
+    measured = 0
+    for code_point in range(BMP_SIZE):
+        width = heuristic_width(code_point)
+        if measurer is not None and width == DEFAULT_WIDTH:
+            font_width = measurer.width(code_point)
+            if font_width is not None:
+                width = font_width
+                measured += 1
+        widths[code_point] = round(width * WIDTH_SCALE)
+
+    # wartości zmierzone ręcznie na przyciskach Discorda mają pierwszeństwo
+    for char, width in CHAR_MAP.items():
+        if len(char) == 1:
+            widths[ord(char)] = round(width * WIDTH_SCALE)
+
+    if sys.byteorder == "big":
+        widths.byteswap()
+    with open(args.output, "wb") as f:
+        widths.tofile(f)
+    print(f"Zapisano {args.output}: {BMP_SIZE} znaków, z czcionki: {measured}")
+
+
+if __name__ == "__main__":
+    main()
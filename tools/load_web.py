@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import aiohttp
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class LoadGenerator:
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.sessions = []
+
+    def guild_ids(self, user_code):
+        # te same serwery, które atrapa Discorda zwraca użytkownikowi (co drugi z uprawnieniami administratora)
+        first = int(user_code) % self.args.bot_guilds
+        return [1000 + (first + i) % self.args.bot_guilds for i in range(0, self.args.guilds_per_user, 2)]
+
+    async def request(self, http, route, url, cookies=None):
+        start = time.perf_counter()
+        try:
+            async with http.get(self.args.base + url, cookies=cookies, allow_redirects=False) as response:
+                await response.read()
+                location = response.headers.get("Location", "")
+                ok = response.status < 400 and not location.startswith(("/error", "/logout"))
+        except aiohttp.ClientError:
+            response = None
+            ok = False
+        self.latencies[route].append(time.perf_counter() - start)
+        if not ok:
+            self.failures[route] += 1
+        return response
+
+    async def login(self, http, user_code):
+        response = await self.request(http, "/login", f"/login?code={user_code}")
+        if response is None:
+            return
+        cookie = response.cookies.get("session_id")
+        if cookie is not None:
+            self.sessions.append((user_code, {"session_id": cookie.value}))
+
+    async def worker(self, http, deadline):
+        while time.perf_counter() < deadline:
+            user_code, cookies = self.random.choice(self.sessions)
+            route = self.random.choice(self.args.routes)
+            if route == "/":
+                await self.request(http, "/", "/")
+            elif route == "/guilds":
+                await self.request(http, "/guilds", "/guilds", cookies)
+            elif route == "/server":
+                guild_id = self.random.choice(self.guild_ids(user_code))
+                await self.request(http, "/server/{id}", f"/server/{guild_id}", cookies)
+            elif route == "/login":
+                await self.login(http, user_code)
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as http:
+            codes = [str(100000 + i) for i in range(self.args.users)]
+            for i in range(0, len(codes), self.args.concurrency):
+                await asyncio.gather(*(self.login(http, code) for code in codes[i:i + self.args.concurrency]))
+            if not self.sessions:
+                print("Nie udało się zalogować żadnego użytkownika, sprawdź DISCORD_API_URL panelu")
+                return
+
+            start = time.perf_counter()
+            deadline = start + self.args.duration
+            await asyncio.gather(*(self.worker(http, deadline) for _ in range(self.args.concurrency)))
+            elapsed = time.perf_counter() - start
+
+        total = sum(len(values) for values in self.latencies.values())
+        print(f"Zapytania: {total}, {total / elapsed:.1f}/s przy {self.args.concurrency} równoległych klientach")
+        print(f"{'trasa':<14}{'liczba':>8}{'błędy':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for route, values in sorted(self.latencies.items()):
+            print(f"{route:<14}{len(values):>8}{self.failures[route]:>8}"
+                  f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 90) * 1000:>10.1f}"
+                  f"{percentile(values, 99) * 1000:>10.1f}{max(values) * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy panelu FastAPI z atrapą Discorda")
+    parser.add_argument("--base", default="http://127.0.0.1:5000", help="adres panelu")
+    parser.add_argument("--users", type=int, default=50, help="liczba logowanych użytkowników")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="czas trwania testu (s)")
+    parser.add_argument("--routes", default="/,/guilds,/server",
+                        help="trasy rozdzielone przecinkami: /, /guilds, /server, /login")
+    parser.add_argument("--guilds-per-user", type=int, default=20, help="musi zgadzać się z atrapą Discorda")
+    parser.add_argument("--bot-guilds", type=int, default=1000, help="musi zgadzać się z atrapą Discorda")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+
+    asyncio.run(LoadGenerator(args).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+import bson.json_util
+
+from bot_utils.RedisHelper import RedisHelper
+from bot_utils.live_leaderboard import LiveLeaderboard
+from config.config import db, redis_client
+
+
+async def buffered_games():
+    # gry z buforów ResultsWriter wszystkich instancji, jeszcze niezapisane w kubełkach
+    games = defaultdict(list)
+    async for key in redis_client.scan_iter(match="results_buffer:*"):
+        for raw in await redis_client.lrange(key, 0, -1):
+            entry = json.loads(raw, object_hook=bson.json_util.object_hook)
+            games[entry["game"]["guild_id"]].append(entry)
+    return games
+
+
+async def rebuild(guild_id):
+    # uruchamiać przy zatrzymanych botach: wyniki gier kończonych w trakcie przebudowy mogłyby zostać nadpisane
+    pending = await buffered_games()
+    leaderboard = LiveLeaderboard(RedisHelper(redis_client, logging.getLogger("leaderboard")), db["LeaderboardBuckets"],
+                                  lambda guild: pending.get(guild, []))
+    guild_ids = [guild_id] if guild_id is not None else await db["LeaderboardBuckets"].distinct("guild_id")
+
+    failed = 0
+    for index, guild in enumerate(guild_ids, 1):
+        if not await leaderboard.rebuild(guild):
+            failed += 1
+        if index % 100 == 0:
+            print(f"Przebudowano {index}/{len(guild_ids)} serwerów")
+    print(f"Gotowe, przebudowano {len(guild_ids) - failed} serwerów, błędy: {failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odbudowuje rankingi w Redisie z kubełków rankingu w MongoDB")
+    parser.add_argument("--guild", type=int, default=None, help="przebuduj tylko jeden serwer")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.guild))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+from bot_modules.quiz_session import QuizSession
+from model.quiz_model import QuizModel
+from tools.fakes import SimCog, FakeGuild, FakeChannel, FakeMessage, FakeUser, FakeInteraction
+from tools.virtual_clock import VirtualClockLoop
+
+
+def build_quiz(index, questions, options, question_time):
+    now = datetime.now(timezone.utc)
+    return QuizModel(
+        title=f"Quiz symulacyjny {index}",
+        created_at=now,
+        updated_at=now,
+        user_id=1,
+        access_code=f"SIM{index:05d}",
+        questions=[
+            {
+                "question": f"Pytanie {q + 1}",
+                "time": question_time,
+                "image_url": None,
+                "options": [{"option": f"Odpowiedź {o + 1}", "is_correct": o == 0} for o in range(options)],
+            }
+            for q in range(questions)
+        ],
+    )
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Simulation:
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.cog = SimCog()
+        self.discord_stats = Counter()
+        self.latencies = []
+        self.answers = 0
+        self.started = 0
+        self.peak_games = 0
+        self.peak_memory = 0
+        self.baseline_memory = 0
+        self.quizzes = [build_quiz(i, args.questions, args.options, args.question_time)
+                        for i in range(args.quizzes)]
+
+    async def answer(self, session, view, user, index):
+        if view.is_finished() or session.game_ended:
+            return
+        interaction = FakeInteraction(user, session.message, self.discord_stats)
+        start = time.perf_counter()
+        await view.children[index].callback(interaction)
+        self.latencies.append(time.perf_counter() - start)
+        self.answers += 1
+
+    def schedule_answers(self, session, view, users):
+        loop = asyncio.get_running_loop()
+        question = session.questions[session.current_question_index]
+        options = len(question.options)
+        for user in users:
+            if self.random.random() >= self.args.answer_rate:
+                continue
+            delay = self.random.uniform(0.5, question.time * 0.95)
+            if self.random.random() < self.args.accuracy:
+                index = 0
+            else:
+                index = self.random.randrange(1, options) if options > 1 else 0
+            loop.call_later(delay, self.cog.spawn, self.answer, session, view, user, index)
+
+    async def run_game(self, game_index):
+        guild = FakeGuild(game_index + 1)
+        channel = FakeChannel(game_index + 1, guild, self.discord_stats, self.args.edit_latency)
+        users = [FakeUser(game_index * self.args.players + p + 1) for p in range(self.args.players)]
+        for user in users:
+            guild.members[user.id] = user
+
+        message = FakeMessage(channel)
+        quiz = self.quizzes[game_index % len(self.quizzes)]
+        session = QuizSession(quiz, channel, self.cog, players=[user.id for user in users], message=message,
+                              game_starter=users[0],
+                              correct_answer_display_time=self.args.answer_display,
+                              scoreboard_display_time=self.args.scoreboard_display,
+                              send_private_messages=True)
+
+        def on_edit(kwargs):
+            if kwargs.get("view") is not None and kwargs["view"] is session.current_view:
+                self.schedule_answers(session, session.current_view, users)
+        message.on_edit = on_edit
+
+        self.cog.active_games[(guild.id, channel.id)] = session
+        self.started += 1
+        await session.start()
+
+    async def monitor(self):
+        while self.started < self.args.games or self.cog.active_games:
+            active = len(self.cog.active_games)
+            if active > self.peak_games:
+                self.peak_games = active
+                if tracemalloc.is_tracing():
+                    self.peak_memory = tracemalloc.get_traced_memory()[0] - self.baseline_memory
+            await asyncio.sleep(1)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        await self.cog.results_writer.start()
+        if self.args.memory:
+            tracemalloc.start()
+            self.baseline_memory = tracemalloc.get_traced_memory()[0]
+
+        real_start = time.perf_counter()
+        virtual_start = loop.time()
+        for game_index in range(self.args.games):
+            delay = self.random.uniform(0, self.args.ramp)
+            loop.call_later(delay, self.cog.spawn, self.run_game, game_index)
+        await self.monitor()
+
+        workers = [self.cog.results_writer.worker, self.cog.scheduler.worker]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await self.cog.results_writer.flush()
+        real_elapsed = time.perf_counter() - real_start
+        virtual_elapsed = loop.time() - virtual_start
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        self.report(real_elapsed, virtual_elapsed)
+
+    def report(self, real_elapsed, virtual_elapsed):
+        games = self.args.games
+        redis = self.cog.redis_client
+        print(f"Gry: {games} (max równolegle {self.peak_games}), gracze na grę: {self.args.players}, "
+              f"pytania: {self.args.questions}")
+        print(f"Czas symulowany: {virtual_elapsed:.0f}s, czas rzeczywisty: {real_elapsed:.2f}s "
+              f"(x{virtual_elapsed / real_elapsed:.0f})")
+        print(f"Odpowiedzi: {self.answers}, {self.answers / real_elapsed:.0f}/s")
+        print(f"Czas obsługi odpowiedzi: p50 {percentile(self.latencies, 50) * 1000:.3f} ms, "
+              f"p99 {percentile(self.latencies, 99) * 1000:.3f} ms")
+        print(f"Redis na grę: {redis.commands / games:.1f} komend, {redis.round_trips / games:.1f} zapytań")
+        mongo_ops = sum(self.cog.db.ops.values())
+        print(f"Mongo na grę: {mongo_ops / games:.2f} operacji ({dict(self.cog.db.ops)})")
+        print(f"Discord na grę: {self.discord_stats['edit'] / games:.1f} edycji, "
+              f"{self.discord_stats['interaction_response'] / games:.1f} odpowiedzi na interakcje")
+        if self.args.memory and self.peak_games:
+            print(f"Pamięć na sesję: {self.peak_memory / self.peak_games / 1024:.1f} KiB")
+        if self.cog.errors:
+            print(f"Błędy: {dict(self.cog.errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Symulacja gier QuizBota bez Discorda, z wirtualnym zegarem")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--options", type=int, default=4)
+    parser.add_argument("--quizzes", type=int, default=20, help="liczba różnych quizów, między którymi losowane są gry")
+    parser.add_argument("--question-time", type=int, default=15)
+    parser.add_argument("--answer-display", type=int, default=5)
+    parser.add_argument("--scoreboard-display", type=int, default=5)
+    parser.add_argument("--ramp", type=float, default=60, help="okres (s), w którym startują kolejne gry")
+    parser.add_argument("--edit-latency", type=float, default=0.15, help="symulowany czas edycji wiadomości (s)")
+    parser.add_argument("--answer-rate", type=float, default=0.95, help="szansa, że gracz odpowie na pytanie")
+    parser.add_argument("--accuracy", type=float, default=0.6, help="szansa poprawnej odpowiedzi")
+    parser.add_argument("--memory", action="store_true", help="mierz pamięć sesji (tracemalloc, wolniej)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    loop = VirtualClockLoop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(Simulation(args).run())
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import asyncio
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    # pętla bez realnego czekania: gdy nic nie jest gotowe, zegar przeskakuje do najbliższego timera,
+    # więc asyncio.sleep, call_later i TimingWheel działają bez zmian, a minuty gry trwają milisekundy
+    def __init__(self):
+        super().__init__()
+        self.virtual_time = 0.0
+
+    def time(self):
+        return self.virtual_time
+
+    def _run_once(self):
+        if not self._ready and self._scheduled:
+            when = self._scheduled[0]._when
+            if when > self.virtual_time:
+                self.virtual_time = when
+        super()._run_once()
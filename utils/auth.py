@@ -14,8 +14,8 @@ class Oauth:
     redirect_uri = os.environ.get('REDIRECT_URL')
     scope = os.environ.get('SCOPE', 'identify%20email%20guilds')
     discord_login_url = os.environ.get('DISCORD_LOGIN_URL')
-    discord_token_url = 'https://discord.com/api/oauth2/token'
-    discord_api_url = 'https://discord.com/api'
+    discord_api_url = os.environ.get('DISCORD_API_URL', 'https://discord.com/api')
+    discord_token_url = discord_api_url + '/oauth2/token'
     session: aiohttp.ClientSession | None
     auth = aiohttp.BasicAuth(str(client_id), client_secret)
 
@@ -6,7 +6,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class DiscordAPI:
-    BASE_URL = "https://discord.com/api/v10"
+    BASE_URL = os.getenv("DISCORD_API_URL", "https://discord.com/api") + "/v10"
 
     def __init__(self):
         self.bot_token = os.getenv("DC_TOKEN")
@@ -25,7 +25,7 @@ class DiscordAPI:
             if response.status == 200:
                 return await response.json()
             elif response.status == 429:
-                retry_after = int(response.headers.get("Retry-After", 1))
+                retry_after = float(response.headers.get("Retry-After", 1))
                 print(f"Rate limit reached. Retrying in {retry_after} seconds...")
                 await asyncio.sleep(retry_after)
                 return await self._make_request(url)
@@ -0,0 +1,7 @@
+import logging
+
+from bot_utils.RedisHelper import RedisHelper
+from bot_utils.search_cache import SearchCache
+from config.config import redis_client
+
+search_cache = SearchCache(RedisHelper(redis_client, logging.getLogger("uvicorn.error")))